@@ -0,0 +1,188 @@
+"""
+Benchmarks offline contra `tests.mock_server`. Cada corrida imprime una tabla y agrega una linea JSON a `--output`
+para comparar los numeros entre versiones:
+
+    python -m benchmarks.bench_sharepoint --output bench_results.jsonl
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import tempfile
+import time
+from enum import Enum
+from importlib import metadata
+
+from pydantic import BaseModel, Field
+
+from sharepoint import pydantic_to_sharepoint, sp_fields
+from sharepoint.parse_pydantic import model_plan
+from tests.mock_server import MockServer
+
+BENCHMARKS = {}
+
+
+def benchmark(name, unit):
+    def register(function):
+        BENCHMARKS[name] = (function, unit)
+        return function
+    return register
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+@benchmark("list_items", "rows/s")
+def bench_list_items(server, options):
+    title = "BenchItems"
+    sharepoint = server.client()
+    sp_list = sharepoint.create_list(title)
+    rows = [{"Title": f"Row {i}", "Amount": i, "Info.Governor": f"Governor {i}"} for i in range(options.rows)]
+    server.mock.add_items(server.mock.find_list(title=title), rows)
+    count, elapsed = timed(lambda: sum(1 for _ in sp_list.iter_items(page_size=options.page_size)))
+    return count / elapsed
+
+
+@benchmark("list_rows_compact", "rows/s")
+def bench_list_rows_compact(server, options):
+    title = "BenchRowsCompact"
+    sp_list = server.client().create_list(title)
+    rows = [{"Title": f"Row {i}", "Amount": i, "Info.Governor": f"Governor {i}"} for i in range(options.rows)]
+    server.mock.add_items(server.mock.find_list(title=title), rows)
+    count, elapsed = timed(lambda: sum(1 for _ in sp_list.iter_rows(page_size=options.page_size)))
+    return count / elapsed
+
+
+@benchmark("bulk_create", "rows/s")
+def bench_bulk_create(server, options):
+    sp_list = server.client().create_list("BenchBulk")
+    rows = [{"Title": f"Row {i}", "Amount": i} for i in range(options.bulk_rows)]
+    results, elapsed = timed(sp_list.bulk_create, rows, batch_size=100)
+    assert all(result.ok for result in results)
+    return len(rows) / elapsed
+
+
+@benchmark("upload", "MB/s")
+def bench_upload(server, options):
+    content = os.urandom(options.file_mb * 1024 * 1024)
+    folder = server.client().root_folder
+    _, elapsed = timed(folder.upload_file, "bench_upload.bin", content, chunk_size=4 * 1024 * 1024)
+    return options.file_mb / elapsed
+
+
+@benchmark("download", "MB/s")
+def bench_download(server, options):
+    content = os.urandom(options.file_mb * 1024 * 1024)
+    file = server.client().root_folder.upload_file("bench_download.bin", content)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "download.bin")
+        _, elapsed = timed(file.download_to, path, chunk_size=1024 * 1024)
+    return options.file_mb / elapsed
+
+
+def state_model():
+    class Color(Enum):
+        blue = "Blue"
+        red = "Red"
+
+    class County(BaseModel):
+        name: str
+        population: int
+        color: Color = Field(..., json_schema_extra={"sp_field": sp_fields.FieldChoices,
+                                                     "choices": [item.value for item in Color]})
+
+    class Info(BaseModel):
+        governor: str
+        age: int
+
+    class State(BaseModel):
+        state: str = Field(..., description="Testing")
+        shortname: str
+        info: Info
+        counties: list[County]
+
+    return State
+
+
+@benchmark("pydantic_to_sharepoint", "models/s")
+def bench_pydantic_to_sharepoint(server, options):
+    State = state_model()
+
+    def convert():
+        for _ in range(options.models):
+            for column in pydantic_to_sharepoint(State):
+                column.payload()
+
+    _, elapsed = timed(convert)
+    return options.models / elapsed
+
+
+def states(State, count):
+    return [State(state=f"State {i}", shortname="ST", info={"governor": f"Governor {i}", "age": i},
+                  counties=[{"name": f"County {j}", "population": j, "color": "Blue"} for j in range(3)])
+            for i in range(count)]
+
+
+@benchmark("flatten_models", "rows/s")
+def bench_flatten_models(server, options):
+    State = state_model()
+    instances = states(State, options.model_rows)
+    count, elapsed = timed(lambda: sum(1 for _ in model_plan(State).payloads(instances)))
+    return count / elapsed
+
+
+@benchmark("hydrate_models", "rows/s")
+def bench_hydrate_models(server, options):
+    State = state_model()
+    plan = model_plan(State)
+    rows = list(plan.payloads(states(State, options.model_rows)))
+    models, elapsed = timed(plan.hydrate_page, rows)
+    assert len(models) == len(rows)
+    return len(models) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--bulk-rows", type=int, default=2_000)
+    parser.add_argument("--file-mb", type=int, default=32)
+    parser.add_argument("--models", type=int, default=2_000)
+    parser.add_argument("--model-rows", type=int, default=100_000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia simulada por request, en segundos")
+    parser.add_argument("--throttle-every", type=int, default=None, help="Responder 429 cada N requests")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), default=None)
+    parser.add_argument("--output", default=None, help="Archivo JSON lines donde agregar los resultados")
+    options = parser.parse_args()
+
+    results = {}
+    with MockServer(latency=options.latency, throttle_every=options.throttle_every,
+                    page_size=options.page_size) as server:
+        for name, (function, unit) in BENCHMARKS.items():
+            if options.only and name not in options.only:
+                continue
+            value = function(server, options)
+            results[name] = {"value": round(value, 2), "unit": unit}
+            print(f"{name:<24} {value:>14,.2f} {unit}")
+
+    if options.output is not None:
+        record = {"version": package_version(),
+                  "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                  "python": platform.python_version(), "options": vars(options), "results": results}
+        with open(options.output, "a") as file:
+            file.write(json.dumps(record) + "\n")
+
+
+def package_version():
+    try:
+        return metadata.version("sharepoint")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,13 @@
 from .sharepoint import SharePoint
+from .async_sharepoint import AsyncSharePoint
 from .session import SharepointSession
-from .parse_pydantic import pydantic_to_sharepoint
\ No newline at end of file
+from .parse_pydantic import pydantic_to_sharepoint
+from .batch import BatchOperation, BatchResult
+from .changes import ChangeSet, FileTokenStore
+from .query import ItemQuery
+from .metrics import RequestStats, RequestEvent, ValidationEvent
+from .cache import ResponseCache
+from .auth import TokenProvider, FileCredentialStore
+from .rows import CompactRow
+from .sync import SyncReport
+from .file_cache import FileCache
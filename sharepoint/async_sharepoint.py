@@ -0,0 +1,135 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Type
+
+from .models import TokenData
+from .session import SharePointError, THROTTLE_STATUS, retry_after_seconds
+from .sharepoint import SharePoint, BaseSharePointModel, GenericModel, List, Folder, File, Item
+from .utils import page_results, page_next
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+
+class AsyncSharePoint:
+    """Cliente asyncio sobre httpx. Los modelos retornados quedan ligados a un `SharePoint` sincrono interno,
+    por lo que sus metodos sincronos siguen funcionando y comparten el mismo token"""
+
+    def __init__(self, client_id: str, tenant_id: str, secret: str, domain: str, site: str,
+                 client: "httpx.AsyncClient" = None, max_concurrency: int = 100, num_retries: int = 5,
+                 backoff_factor: float = 0.1, sharepoint: SharePoint = None):
+        if httpx is None:
+            raise ImportError("AsyncSharePoint requires httpx: pip install sharepoint[async]")
+        self.sharepoint = sharepoint if sharepoint is not None else SharePoint(
+            client_id=client_id, tenant_id=tenant_id, secret=secret, domain=domain, site=site)
+        if client is None:
+            limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+            accept = f"application/json;odata={self.sharepoint.odata}"
+            client = httpx.AsyncClient(headers={"accept": accept}, limits=limits,
+                                       timeout=httpx.Timeout(60))
+        self.client = client
+        self.num_retries = num_retries
+        self.backoff_factor = backoff_factor
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    @property
+    def api(self):
+        return self.sharepoint.api
+
+    async def access_token(self) -> TokenData:
+        # Mismo TokenProvider que el cliente sincrono: solo se sale del event loop cuando hay que renovar
+        provider = self.sharepoint.token_provider
+        token_data = provider.current
+        if token_data is not None and not provider.needs_refresh(token_data):
+            return token_data
+        return await asyncio.to_thread(provider.token)
+
+    async def get_auth_token(self) -> TokenData:
+        return await asyncio.to_thread(self.sharepoint.get_auth_token)
+
+    async def request(self, method: str, url: str, **kwargs) -> "httpx.Response":
+        token = await self.access_token()
+        headers = {**kwargs.pop("headers", {}), "Authorization": f"Bearer {token.access_token}"}
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                response = await self.client.request(method, url, headers=headers, **kwargs)
+            if response.status_code not in THROTTLE_STATUS or attempt >= self.num_retries:
+                break
+            wait = retry_after_seconds(response)
+            await asyncio.sleep(wait if wait is not None else self.backoff_factor * (2 ** attempt))
+            attempt += 1
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise SharePointError(response.text) from e
+        return response
+
+    async def get_data(self, url: str, params: dict = None) -> dict:
+        response = await self.request("GET", url, params=params)
+        return self.sharepoint.response_data(response)
+
+    async def get_list(self, title) -> List:
+        data = await self.get_data(self.api + f"/lists/GetByTitle('{title}')")
+        return List(**data, sharepoint=self.sharepoint)
+
+    async def get_all_lists(self) -> list[List]:
+        data = await self.get_data(self.api + "/lists/?$filter=Hidden eq false and IsCatalog eq false")
+        return [List(**list_, sharepoint=self.sharepoint) for list_ in page_results(data)]
+
+    async def get_folder(self, path: str) -> Folder:
+        data = await self.get_data(self.api + f"/GetFolderByServerRelativeUrl('{path}')")
+        return Folder(**data, sharepoint=self.sharepoint)
+
+    async def get_deferred_item(self, instance: BaseSharePointModel, deferred_field: str,
+                                model: Type[GenericModel], params: dict = None) -> GenericModel:
+        url = instance.deferred_uri(deferred_field)
+        data = await self.get_data(url, params)
+        return model.from_data(data, self.sharepoint, source=url)
+
+    async def iter_deferred_pages(self, instance: BaseSharePointModel, deferred_field: str,
+                                  model: Type[GenericModel], params: dict = None,
+                                  page_size: int = None) -> AsyncIterator[list[GenericModel]]:
+        params = {} if params is None else dict(params)
+        if page_size is not None:
+            params["$top"] = page_size
+        url = instance.deferred_uri(deferred_field)
+        data = await self.get_data(url, params)
+        while True:
+            next_url = page_next(data)
+            yield [model.from_data(item, self.sharepoint, source=url, collection=True) for item in page_results(data)]
+            if not next_url:
+                return
+            data = await self.get_data(next_url)
+
+    async def iter_deferred_items(self, instance: BaseSharePointModel, deferred_field: str,
+                                  model: Type[GenericModel], params: dict = None,
+                                  page_size: int = None) -> AsyncIterator[GenericModel]:
+        async for page in self.iter_deferred_pages(instance, deferred_field, model, params, page_size):
+            for item in page:
+                yield item
+
+    async def get_deferred_items(self, instance: BaseSharePointModel, deferred_field: str,
+                                 model: Type[GenericModel], params: dict = None) -> list[GenericModel]:
+        return [item async for item in self.iter_deferred_items(instance, deferred_field, model, params)]
+
+    def iter_items(self, list_: List, params: dict = None, page_size: int = None) -> AsyncIterator[Item]:
+        return self.iter_deferred_items(list_, "Items", Item, params, page_size)
+
+    # Files y Folders no se paginan con `__next`: un $top recortaria el resultado, asi que se piden completos
+    def iter_files(self, folder: Folder) -> AsyncIterator[File]:
+        return self.iter_deferred_items(folder, "Files", File)
+
+    def iter_folders(self, folder: Folder) -> AsyncIterator[Folder]:
+        return self.iter_deferred_items(folder, "Folders", Folder)
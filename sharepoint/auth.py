@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+
+import requests
+
+from .models import TokenData
+from .session import SharePointError
+from .utils import JsonFileStore
+
+REFRESH_MARGIN = 300  # Segundos antes de expirar en que se renueva el token en segundo plano
+
+
+class FileCredentialStore(JsonFileStore):
+    """Persiste tokens de acceso para compartirlos entre procesos. El archivo solo lo puede leer su dueno (0600)"""
+    mode = 0o600
+
+
+class TokenProvider:
+    """Entrega el token de acceso de una app (client credentials) y lo renueva una sola vez aunque lo pidan varios
+    threads a la vez. Faltando `refresh_margin` segundos para expirar se renueva en segundo plano, sin bloquear a
+    quienes siguen usando el token vigente. Con `store` (ej: `FileCredentialStore`) el token se comparte entre procesos"""
+
+    _shared: dict[tuple, "TokenProvider"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, url: str, client_id: str, secret: str, resource: str, session: requests.Session = None,
+                 refresh_margin: float = REFRESH_MARGIN, store: FileCredentialStore = None):
+        self.url = url
+        self.client_id = client_id
+        self.secret = secret
+        self.resource = resource
+        self.session = session if session is not None else requests.Session()
+        self.refresh_margin = refresh_margin
+        self.store = store
+        self._token: TokenData | None = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    @classmethod
+    def shared(cls, url: str, client_id: str, secret: str, resource: str, **kwargs) -> "TokenProvider":
+        """Un provider por (url, client, resource) en el proceso, compartido por todas las instancias de SharePoint"""
+        key = (url, client_id, resource)
+        with cls._shared_lock:
+            provider = cls._shared.get(key)
+            if provider is None or provider.secret != secret:
+                provider = cls(url, client_id, secret, resource, **kwargs)
+                cls._shared[key] = provider
+            return provider
+
+    @property
+    def store_key(self) -> str:
+        return f"{self.client_id}|{self.resource}"
+
+    @property
+    def current(self) -> TokenData | None:
+        return self._token
+
+    def token(self) -> TokenData:
+        token_data = self._token
+        if token_data is None or token_data.is_expired():
+            return self.refresh(token_data)
+        if self.needs_refresh(token_data):
+            self._refresh_in_background()
+        return token_data
+
+    def needs_refresh(self, token_data: TokenData) -> bool:
+        # Tokens de vida corta se renuevan a la mitad de su vida para no renovar en cada acceso
+        return token_data.expires_within(min(self.refresh_margin, token_data.expire_in / 2))
+
+    def refresh(self, stale: TokenData | None = None) -> TokenData:
+        """Renueva el token. Si otro thread ya lo renovo mientras se esperaba el lock, se usa ese"""
+        with self._lock:
+            token_data = self._token
+            if token_data is not None and token_data is not stale and not token_data.is_expired():
+                return token_data
+            token_data = self._load()
+            if token_data is None or self.needs_refresh(token_data):
+                token_data = self.fetch()
+                self._save(token_data)
+            self._token = token_data
+            return token_data
+
+    def fetch(self) -> TokenData:
+        data = {"grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.secret,
+                "resource": self.resource}
+        response = self.session.post(self.url, data=data)
+        token_json = response.json()
+        if "access_token" not in token_json:
+            raise SharePointError(str(token_json))
+        return TokenData(expire_in=int(token_json["expires_in"]), access_token=token_json["access_token"])
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._token = None
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        stale = self._token
+
+        def run():
+            try:
+                self.refresh(stale)
+            except Exception:
+                pass  # El proximo acceso reintenta; el token vigente sigue sirviendo hasta expirar
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _load(self) -> TokenData | None:
+        if self.store is None:
+            return None
+        value = self.store.get(self.store_key)
+        if value is None:
+            return None
+        value = json.loads(value)
+        token_data = TokenData(access_token=value["access_token"], expire_in=int(value["expire_on"] - time.time()))
+        token_data.expire_on = value["expire_on"]
+        return None if token_data.is_expired() else token_data
+
+    def _save(self, token_data: TokenData):
+        if self.store is not None:
+            value = {"access_token": token_data.access_token, "expire_on": token_data.expire_on}
+            self.store.set(self.store_key, json.dumps(value))
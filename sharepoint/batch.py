@@ -0,0 +1,105 @@
+import json
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+HTTP_STATUS = re.compile(r"^HTTP/1\.1 (\d{3})")
+BATCH_HEADERS = {"Content-Type": "application/json;odata=verbose",
+                 "Accept": "application/json;odata=verbose",
+                 "IF-MATCH": "*"}
+
+
+@dataclass
+class BatchOperation:
+    method: str
+    url: str
+    payload: dict | None = None
+
+
+@dataclass
+class BatchResult:
+    """Resultado de una operacion dentro de un $batch, en el mismo orden en que fue agregada"""
+    index: int
+    status: int
+    data: Any = None
+    error: str | None = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def build_batch_body(operations: list[BatchOperation], batch_boundary: str, changeset_boundary: str) -> str:
+    lines = [f"--{batch_boundary}",
+             f"Content-Type: multipart/mixed; boundary=\"{changeset_boundary}\"",
+             ""]
+    for operation in operations:
+        lines += [f"--{changeset_boundary}",
+                  "Content-Type: application/http",
+                  "Content-Transfer-Encoding: binary",
+                  "",
+                  f"{operation.method} {operation.url} HTTP/1.1"]
+        lines += [f"{key}: {value}" for key, value in BATCH_HEADERS.items()]
+        lines.append("")
+        if operation.payload is not None:
+            lines.append(json.dumps(operation.payload))
+        lines.append("")
+    lines += [f"--{changeset_boundary}--", f"--{batch_boundary}--", ""]
+    return "\r\n".join(lines)
+
+
+def error_message(data: Any) -> str:
+    try:
+        return data["error"]["message"]["value"]
+    except (TypeError, KeyError):
+        return str(data)
+
+
+def parse_batch_response(text: str) -> list[tuple[int, Any]]:
+    """Extrae (status, json) de cada respuesta HTTP embebida en un multipart/mixed"""
+    responses = []
+    lines = iter(text.splitlines())
+    for line in lines:
+        match = HTTP_STATUS.match(line)
+        if match is None:
+            continue
+        status = int(match.group(1))
+        # Saltar headers de la respuesta interna
+        for header in lines:
+            if not header.strip():
+                break
+        body = []
+        for body_line in lines:
+            if body_line.startswith("--"):
+                break
+            body.append(body_line)
+        body = "\n".join(body).strip()
+        try:
+            data = json.loads(body) if body else None
+        except json.JSONDecodeError:
+            data = body
+        responses.append((status, data))
+    return responses
+
+
+def send_batch(session, url: str, operations: list[BatchOperation]) -> list[BatchResult]:
+    batch_boundary = f"batch_{uuid.uuid4()}"
+    changeset_boundary = f"changeset_{uuid.uuid4()}"
+    body = build_batch_body(operations, batch_boundary, changeset_boundary)
+    headers = {"content-type": f"multipart/mixed; boundary=\"{batch_boundary}\""}
+    response = session.post(url, data=body.encode("utf-8"), headers=headers)
+    responses = parse_batch_response(response.text)
+
+    results = []
+    for index, operation in enumerate(operations):
+        if index >= len(responses):
+            results.append(BatchResult(index=index, status=0, error="No response for operation in batch"))
+            continue
+        status, data = responses[index]
+        if status >= 400:
+            results.append(BatchResult(index=index, status=status, error=error_message(data)))
+        else:
+            data = data["d"] if isinstance(data, dict) and "d" in data else data
+            results.append(BatchResult(index=index, status=status, data=data))
+    return results
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from urllib.parse import urlencode
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    etag: str | None
+    data: dict
+    tags: list[str] = field(default_factory=list)
+    stored: float = field(default_factory=time.time)
+
+    def is_fresh(self, max_age: float) -> bool:
+        return time.time() - self.stored < max_age
+
+
+class ResponseCache:
+    """Cache LRU de respuestas GET de metadata (listas, carpetas, campos), revalidadas con If-None-Match.
+    Con `path` las entradas tambien se guardan en disco y se recargan al crear el cache.
+    Con `max_age` > 0 las entradas se usan sin revalidar durante esos segundos"""
+
+    def __init__(self, max_entries: int = 512, path=None, max_age: float = 0.0):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.path = Path(path) if path is not None else None
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    @staticmethod
+    def key(url: str, params: dict = None) -> str:
+        return f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def _load(self):
+        files = sorted(self.path.glob("*.json"), key=lambda file: file.stat().st_mtime)
+        for file in files[-self.max_entries:]:
+            try:
+                with open(file, "r") as stream:
+                    data = json.load(stream)
+                key = data.pop("key")
+                self._entries[key] = CachedResponse(**data)
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+
+    def _write(self, key: str, entry: CachedResponse):
+        file = self._file(key)
+        temp_path = file.with_suffix(".tmp")
+        with open(temp_path, "w") as stream:
+            json.dump({"key": key, **asdict(entry)}, stream)
+        os.replace(temp_path, file)
+
+    def _remove(self, key: str):
+        self._entries.pop(key, None)
+        if self.path is not None:
+            self._file(key).unlink(missing_ok=True)
+
+    def get(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, etag: str | None, data: dict, tags: list[str] = ()) -> CachedResponse:
+        entry = CachedResponse(url=key, etag=etag, data=data, tags=sorted({tag.lower() for tag in tags}))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if self.path is not None:
+                self._write(key, entry)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def touch(self, key: str):
+        """Marca una entrada como recien revalidada (respuesta 304)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.stored = time.time()
+
+    def invalidate(self, uri: str) -> int:
+        """Elimina las entradas de `uri` y de todo lo que cuelga de ella. Retorna cuantas se eliminaron"""
+        uri = uri.lower()
+        with self._lock:
+            keys = [key for key, entry in self._entries.items()
+                    if any(tag == uri or tag.startswith(uri + "/") for tag in entry.tags)]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,43 @@
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from .utils import JsonFileStore
+
+
+class ChangeType(IntEnum):
+    add = 1
+    update = 2
+    delete_object = 3
+    rename = 4
+    move_away = 5
+    move_into = 6
+    restore = 7
+
+
+@dataclass
+class ChangeSet:
+    """Cambios de una lista desde un token. Guardar `token` para la siguiente sincronizacion"""
+    token: str
+    added: list[Any] = field(default_factory=list)
+    updated: list[Any] = field(default_factory=list)
+    deleted: list[int] = field(default_factory=list)
+    full_resync: bool = False
+
+
+class FileTokenStore(JsonFileStore):
+    """Persiste los change tokens en un archivo JSON, uno por llave (ej: id de la lista)"""
+
+
+def change_query(token: str | None) -> dict:
+    query = {"__metadata": {"type": "SP.ChangeQuery"},
+             "Add": True, "Update": True, "DeleteObject": True, "Restore": True,
+             "Rename": True, "Move": True, "Item": True}
+    if token is not None:
+        query["ChangeTokenStart"] = {"__metadata": {"type": "SP.ChangeToken"}, "StringValue": token}
+    return {"query": query}
+
+
+def is_invalid_token_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return "change token" in message or "changetoken" in message
@@ -0,0 +1,116 @@
+import csv
+import datetime
+import json
+from collections.abc import Iterator
+from typing import Any, TYPE_CHECKING
+
+from .utils import COLUMN_CODEC
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+if TYPE_CHECKING:
+    from .sharepoint import List, ListField
+
+EXPORT_FORMATS = ("parquet", "arrow", "csv")
+BASE_COLUMNS = ("ID", "Title", "Created", "Modified")
+
+# TypeAsString -> tipo de columna
+FIELD_KINDS = {"Integer": "int", "Counter": "int", "Number": "float", "Currency": "float", "Boolean": "bool",
+               "DateTime": "datetime", "Lookup": "lookup", "User": "lookup", "LookupMulti": "lookup_multi",
+               "UserMulti": "lookup_multi"}
+
+
+def column_kind(field: "ListField") -> str:
+    return FIELD_KINDS.get(field.field_type, "string")
+
+
+def export_columns(sp_list: "List") -> list[tuple[str, str, str]]:
+    """(llave en el JSON del item, nombre de la columna exportada, tipo) segun el esquema de la lista.
+    Los lookups se exportan como el id del item referenciado (`<Campo>Id`)"""
+    schema = sp_list.field_schema
+    fields = [schema.by_internal_name[name] for name in BASE_COLUMNS if name in schema.by_internal_name]
+    fields += sp_list.get_user_created_fields()
+    columns = []
+    for field in fields:
+        if field.hidden or any(key == field.internal_name for key, _, _ in columns):
+            continue
+        kind = column_kind(field)
+        name = COLUMN_CODEC.decode(field.internal_name)
+        if kind in ("lookup", "lookup_multi"):
+            columns.append((f"{field.internal_name}Id", f"{name}Id", "int" if kind == "lookup" else "string"))
+        else:
+            columns.append((field.internal_name, name, kind))
+    return columns
+
+
+def convert_value(value: Any, kind: str) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        # Campos multivalor en odata=verbose vienen como {"__metadata": ..., "results": [...]}
+        value = value.get("results", value)
+    match kind:
+        case "int":
+            return int(value)
+        case "float":
+            return float(value)
+        case "bool":
+            return bool(value)
+        case "datetime":
+            return datetime.datetime.fromisoformat(value)
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def iter_column_pages(sp_list: "List", columns: list[tuple[str, str, str]], params: dict = None,
+                      page_size: int = None) -> Iterator[dict[str, list]]:
+    """Una pagina de items a la vez como columnas ya convertidas"""
+    params = {**(params or {}), "$select": ",".join(key for key, _, _ in columns)}
+    for rows in sp_list.iter_deferred_data("Items", params, page_size):
+        yield {name: [convert_value(row.get(key), kind) for row in rows] for key, name, kind in columns}
+
+
+def arrow_schema(columns: list[tuple[str, str, str]]):
+    types = {"int": pyarrow.int64(), "float": pyarrow.float64(), "bool": pyarrow.bool_(),
+             "datetime": pyarrow.timestamp("us", tz="UTC"), "string": pyarrow.string()}
+    return pyarrow.schema([(name, types[kind]) for _, name, kind in columns])
+
+
+def export_list(sp_list: "List", path, format: str = None, params: dict = None, page_size: int = None) -> int:
+    """Escribe los items de la lista en `path` pagina por pagina, sin cargar la lista completa en memoria.
+    `format` es parquet, arrow o csv; por defecto parquet si pyarrow esta instalado y si no csv.
+    Retorna la cantidad de filas escritas"""
+    format = format or ("parquet" if pyarrow is not None else "csv")
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {EXPORT_FORMATS}, got {format!r}")
+    if format != "csv" and pyarrow is None:
+        raise ImportError(f"Exporting to {format} requires pyarrow: pip install sharepoint[export]")
+
+    columns = export_columns(sp_list)
+    pages = iter_column_pages(sp_list, columns, params, page_size)
+    count = 0
+    if format == "csv":
+        names = [name for _, name, _ in columns]
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(names)
+            for page in pages:
+                writer.writerows(zip(*(page[name] for name in names)))
+                count += len(page[names[0]]) if names else 0
+        return count
+
+    schema = arrow_schema(columns)
+    if format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(path, schema)
+    else:
+        writer = pyarrow.ipc.new_file(path, schema)
+    with writer:
+        for page in pages:
+            batch = pyarrow.record_batch([page[name] for name in schema.names], schema=schema)
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
@@ -0,0 +1,82 @@
+import hashlib
+import os
+import uuid
+from collections.abc import Iterable
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+class FileCache:
+    """Cache en disco del contenido de archivos, direccionado por (UniqueId, ETag): una version nueva del archivo
+    es otra entrada, por lo que nunca se sirve contenido viejo. Acotado a `max_bytes`, descartando los menos usados
+    (segun mtime). Las escrituras son atomicas (temporal + os.replace), asi que varios procesos pueden compartir el
+    mismo directorio"""
+
+    def __init__(self, directory, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, identity: str, etag: str) -> Path:
+        key = hashlib.sha256(f"{identity}\n{etag}".encode("utf-8")).hexdigest()
+        return self.directory / key
+
+    def get(self, identity: str, etag: str | None) -> Path | None:
+        if etag is None:
+            return None
+        path = self.path(identity, etag)
+        try:
+            os.utime(path)  # Marca el uso para el LRU
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, identity: str, etag: str, chunks: Iterable[bytes]) -> Path:
+        path = self.path(identity, etag)
+        temp_path = self.directory / f".{path.name}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "wb") as stream:
+                for chunk in chunks:
+                    stream.write(chunk)
+            os.replace(temp_path, path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+        self.evict(keep=path)
+        return path
+
+    def discard(self, identity: str, etag: str | None):
+        if etag is not None:
+            self.path(identity, etag).unlink(missing_ok=True)
+
+    def entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.iterdir():
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # Eliminado por otro proceso
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep: Path = None):
+        """Elimina las entradas menos usadas hasta quedar bajo `max_bytes`. Un proceso que ya abrio (o mapeo en
+        memoria) un archivo eliminado lo sigue pudiendo leer"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            path.unlink(missing_ok=True)
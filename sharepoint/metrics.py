@@ -0,0 +1,99 @@
+import re
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit, unquote
+
+TEMPLATE_PATTERNS = [(re.compile(r"guid'[^']*'", re.IGNORECASE), "guid'{}'"),
+                     (re.compile(r"'[^']*'"), "'{}'"),
+                     (re.compile(r"\(\d+\)"), "({})"),
+                     (re.compile(r"=\d+"), "={}")]
+
+
+def endpoint_template(url: str) -> str:
+    """Normaliza una url a su plantilla: `/_api/web/lists(guid'{}')/Items({})`"""
+    path = unquote(urlsplit(url).path)
+    index = path.find("/_api")
+    path = path[index:] if index >= 0 else path
+    for pattern, replacement in TEMPLATE_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+@dataclass
+class RequestEvent:
+    method: str
+    endpoint: str
+    status: int
+    latency: float
+    bytes_out: int
+    bytes_in: int
+    retries: int = 0
+    throttle_wait: float = 0.0
+
+
+@dataclass
+class ValidationEvent:
+    endpoint: str
+    model: str
+    rows: int
+    seconds: float
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+@dataclass
+class EndpointStats:
+    count: int = 0
+    errors: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    retries: int = 0
+    throttle_wait: float = 0.0
+    validation_seconds: float = 0.0
+    validated_rows: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=10_000))
+
+    def summary(self) -> dict:
+        latencies = list(self.latencies)
+        return {"count": self.count, "errors": self.errors, "p50": percentile(latencies, 0.5),
+                "p95": percentile(latencies, 0.95), "max": max(latencies, default=0.0),
+                "bytes_in": self.bytes_in, "bytes_out": self.bytes_out, "retries": self.retries,
+                "throttle_wait": self.throttle_wait, "validation_seconds": self.validation_seconds,
+                "validated_rows": self.validated_rows}
+
+
+class RequestStats:
+    """Observador que agrega los eventos por endpoint. Registrar con `SharepointSession.add_observer(stats)`"""
+
+    def __init__(self):
+        self.endpoints: dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self._lock = threading.Lock()
+
+    def __call__(self, event: RequestEvent | ValidationEvent) -> None:
+        with self._lock:
+            stats = self.endpoints[event.endpoint]
+            if isinstance(event, ValidationEvent):
+                stats.validation_seconds += event.seconds
+                stats.validated_rows += event.rows
+                return
+            stats.count += 1
+            stats.errors += event.status >= 400
+            stats.bytes_in += event.bytes_in
+            stats.bytes_out += event.bytes_out
+            stats.retries += event.retries
+            stats.throttle_wait += event.throttle_wait
+            stats.latencies.append(event.latency)
+
+    def summary(self) -> dict[str, dict]:
+        with self._lock:
+            return {endpoint: stats.summary() for endpoint, stats in self.endpoints.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.endpoints.clear()
@@ -1,5 +1,7 @@
 import time
-from dataclasses import dataclass
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
 
 from pydantic import BaseModel
 
@@ -16,7 +18,43 @@ class TokenData:
         now = time.time()
         return now >= self.expire_on
 
+    def expires_within(self, seconds: float) -> bool:
+        return time.time() + seconds >= self.expire_on
 
 
+@dataclass
+class UploadResult:
+    """Resultado de un archivo en `Folder.upload_many`, en la posicion `index` de la entrada"""
+    index: int
+    name: str
+    file: Any = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
 
+@dataclass
+class SchemaChanges:
+    """Resultado de `List.ensure_schema`, por titulo de columna. Las columnas en `conflicts` existen con otro tipo
+    y no se modifican"""
+    created: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    conflicts: list[str] = field(default_factory=list)
+    errors: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.created or self.updated)
+
+
+@dataclass
+class UploadSession:
+    """Estado de una subida por partes. Permite retomar desde el ultimo offset confirmado por el servidor"""
+    file_name: str
+    file_uri: str
+    size: int
+    upload_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    offset: int = 0
@@ -1,14 +1,17 @@
 import datetime
+import json
 from collections import deque
-from collections.abc import Sequence
+from collections.abc import Sequence, Iterable, Iterator
 from enum import Enum
-from queue import Queue
+from functools import lru_cache
+from operator import attrgetter
 from typing import Type, Any, get_origin, get_args
 
 from pydantic import BaseModel, Field, ConfigDict
 from pydantic.fields import FieldInfo
 
 from sharepoint import sp_fields
+from sharepoint.utils import COLUMN_CODEC
 
 ITERABLE_ORIGINS = (list, set, tuple, frozenset, deque, Sequence)
 
@@ -33,12 +36,12 @@ class Node(BaseModel):
 
 
 def traverse_fields(model: Type[BaseModel]):
-    queue: Queue[Node] = Queue()
+    queue: deque[Node] = deque()
     root_node = Node(fields=model.model_fields, type=model)
-    queue.put(root_node)
+    queue.append(root_node)
     end_nodes = []
-    while not queue.empty():
-        node = queue.get()
+    while queue:
+        node = queue.popleft()
         path = node.path
         for name, field_info in node.fields.items():
             annotation = field_info.annotation
@@ -61,7 +64,7 @@ def traverse_fields(model: Type[BaseModel]):
                 is_array=is_array, field=field_info, extra=extra,
             )
             if is_pydantic:
-                queue.put(sub_node)
+                queue.append(sub_node)
             else:
                 end_nodes.append(sub_node)
 
@@ -76,25 +79,31 @@ class SharePointColumn:
         self.required = node.field.is_required()
         self.field_info = node.field
         self.extra = node.extra
+        self.is_array = any(step.is_array for step in node.path)
 
     @staticmethod
     def reduce_title(node: Node):
         title = ".".join(node.name for node in node.path)
         return title
 
-    def payload(self):
+    def field(self) -> sp_fields.Field:
         extra = dict(self.extra)
         field = extra.pop("sp_field", None)
         if field is None:
-            extra["field_type_kind"] = SHAREPOINT_TYPES[self.type]
+            # Los arreglos se guardan como JSON en una columna de texto multilinea
+            extra["field_type_kind"] = SHAREPOINT_TYPES["note"] if self.is_array else SHAREPOINT_TYPES[self.type]
             field = sp_fields.Field
+        elif self.is_array and issubclass(field, sp_fields.FieldChoices):
+            extra["field_type_kind"] = SHAREPOINT_TYPES["multichoice"]
         # Extract relevant field metadata for the payload
         data = {}
         if self.field_info.description is not None:
             data["description"] = self.field_info.description
         data.update(extra)
-        field_instance = field(**data, title=self.title)  # , required=self.required)
-        payload = field_instance.payload()
+        return field(**data, title=self.title)  # , required=self.required)
+
+    def payload(self):
+        payload = self.field().payload()
         return payload
 
     def __repr__(self):
@@ -108,6 +117,151 @@ def pydantic_to_sharepoint(model: Type[BaseModel]):
     return columns
 
 
+def leaf_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def compile_getter(path: list[Node]):
+    """Funcion que lee el valor de una columna desde una instancia. Los tramos sin arreglos se leen con un solo
+    attrgetter; cada arreglo del path aplana sus elementos en una sola lista"""
+    index = next((i for i, node in enumerate(path) if node.is_array), None)
+    end = len(path) if index is None else index + 1
+    head = attrgetter(".".join(node.name for node in path[:end]))
+
+    def get_head(instance):
+        try:
+            return head(instance)
+        except AttributeError:  # Algun modelo intermedio es None
+            return None
+
+    if index is None or end == len(path):
+        return get_head
+
+    inner = compile_getter(path[end:])
+    inner_is_array = any(node.is_array for node in path[end:])
+
+    def get(instance):
+        elements = get_head(instance)
+        if elements is None:
+            return None
+        values = []
+        for element in elements:
+            value = inner(element)
+            if inner_is_array:
+                values.extend(value or ())
+            else:
+                values.append(value)
+        return values
+
+    return get
+
+
+def compile_setter(path: list[Node]):
+    """Funcion inversa a `compile_getter`: escribe el valor de una columna en el dict anidado que se valida contra
+    el modelo. Un arreglo de modelos se reparte por posicion (columna `counties.name` -> counties[i].name)"""
+    keys = [node.field.alias or node.name for node in path]
+    index = next((i for i, node in enumerate(path) if node.is_array), None)
+    if index is None or index == len(path) - 1:
+        parents, last = keys[:-1], keys[-1]
+
+        def set_value(data, value):
+            for key in parents:
+                data = data.setdefault(key, {})
+            data[last] = value
+
+        return set_value
+
+    parents, array_key, rest = keys[:index], keys[index], path[index + 1:]
+    set_element = compile_setter(rest)
+
+    def set_values(data, values):
+        for key in parents:
+            data = data.setdefault(key, {})
+        elements = data.setdefault(array_key, [])
+        for i, value in enumerate(values or ()):
+            if i == len(elements):
+                elements.append({})
+            set_element(elements[i], value)
+
+    return set_values
+
+
+class ColumnPlan:
+    __slots__ = ("title", "key", "getter", "setter", "is_array", "multichoice")
+
+    def __init__(self, node: Node):
+        column = SharePointColumn(node)
+        self.title = column.title
+        self.key = COLUMN_CODEC.encode(self.title)
+        self.getter = compile_getter(node.path)
+        self.setter = compile_setter(node.path)
+        self.is_array = column.is_array
+        # El valor se escribe segun el tipo de la columna que crea `pydantic_to_sharepoint` para el mismo nodo
+        kind = column.field().field_type_kind
+        self.multichoice = kind == SHAREPOINT_TYPES["multichoice"]
+        if self.is_array and not self.multichoice and kind not in TEXT_KINDS:
+            raise ValueError(f"Column {self.title!r} holds a list but maps to FieldTypeKind {kind}; lists are stored "
+                             f"in Note, Text or MultiChoice columns")
+
+    def load(self, value: Any) -> Any:
+        """Valor crudo de la columna en el JSON del item -> valor para el modelo"""
+        if not self.is_array or value is None:
+            return value
+        if isinstance(value, dict):
+            return value.get("results", [])
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    def value(self, instance: BaseModel) -> Any:
+        value = self.getter(instance)
+        if not self.is_array:
+            return leaf_value(value)
+        values = [leaf_value(element) for element in value or ()]
+        if self.multichoice:
+            return {"__metadata": {"type": "Collection(Edm.String)"}, "results": values}
+        # Arreglos en columnas de texto se guardan como JSON
+        return json.dumps(values)
+
+
+class ModelPlan:
+    """Plan precompilado entre `model` y las columnas que crea `pydantic_to_sharepoint`: aplana instancias en
+    payloads de items sin pasar por `model_dump`, y reconstruye instancias anidadas desde el JSON crudo de los items.
+    La reconstruccion soporta un nivel de arreglos en cada path"""
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.columns = [ColumnPlan(node) for node in traverse_fields(model)]
+        self.select = ",".join(column.key for column in self.columns)
+
+    def payload(self, instance: BaseModel) -> dict[str, Any]:
+        return {column.key: column.value(instance) for column in self.columns}
+
+    def payloads(self, instances: Iterable[BaseModel]) -> Iterator[dict[str, Any]]:
+        payload = self.payload
+        for instance in instances:
+            yield payload(instance)
+
+    def hydrate(self, row: dict[str, Any]) -> BaseModel:
+        data = {}
+        for column in self.columns:
+            column.setter(data, column.load(row.get(column.key)))
+        return self.model.model_validate(data)
+
+    def hydrate_page(self, rows: Iterable[dict[str, Any]]) -> list[BaseModel]:
+        hydrate = self.hydrate
+        return [hydrate(row) for row in rows]
+
+
+@lru_cache(maxsize=None)
+def model_plan(model: Type[BaseModel]) -> ModelPlan:
+    return ModelPlan(model)
+
+
 SHAREPOINT_TYPES = {'integer': 1,  # 'integer'
                     str: 2,  # 'text'
                     'note': 3,
@@ -141,3 +295,4 @@ SHAREPOINT_TYPES = {'integer': 1,  # 'integer'
                     'alldayevent': 29,
                     'workfloweventtype': 30,
                     'maxitems': 31}
+TEXT_KINDS = (SHAREPOINT_TYPES[str], SHAREPOINT_TYPES['note'])
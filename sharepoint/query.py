@@ -0,0 +1,151 @@
+import re
+from collections.abc import Iterator
+from datetime import date, datetime
+from typing import Any, Type, TypeVar, Generic, TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from .rows import CompactRow
+from .utils import COLUMN_CODEC, METADATA_KEYS
+
+if TYPE_CHECKING:
+    from .sharepoint import List
+
+GenericModel = TypeVar('GenericModel', bound=BaseModel)
+
+# Literales de texto (con '' como comilla escapada) o identificadores; los numeros como 1.5 no calzan
+FILTER_TOKEN = re.compile(r"'(?:[^']|'')*'|[A-Za-z_][\w.]*")
+
+
+def escape_column(column: str) -> str:
+    """Escapa un nombre de columna; `/` separa lookups expandidos (ej: Author/Title)"""
+    return "/".join(COLUMN_CODEC.encode(part) for part in column.split("/"))
+
+
+def escape_filter(expression: str) -> str:
+    """Escapa los `.` de los identificadores de una expresion $filter, sin tocar literales ni numeros"""
+    return FILTER_TOKEN.sub(lambda match: match[0] if match[0].startswith("'") else match[0].replace(".", "_x002e_"),
+                            expression)
+
+
+def odata_literal(value: Any) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return f"datetime'{value.isoformat()}'"
+    value = str(value).replace("'", "''")
+    return f"'{value}'"
+
+
+def model_columns(model: Type[BaseModel]) -> dict[str, str]:
+    """Columna escapada -> llave de validacion (alias o nombre del campo) de un modelo plano"""
+    columns = {}
+    for name, field_info in model.model_fields.items():
+        key = field_info.alias or name
+        columns[COLUMN_CODEC.encode(key)] = key
+    return columns
+
+
+class ItemQuery(Generic[GenericModel]):
+    """Query sobre los items de una lista que empuja $select/$filter/$orderby/$expand/$top al servidor.
+    Con `model` cada fila se valida directamente contra ese modelo, sin pasar por `Item`"""
+
+    def __init__(self, sp_list: "List", model: Type[GenericModel] = None):
+        self.sp_list = sp_list
+        self.model = model
+        self._columns = model_columns(model) if model is not None else None
+        self._select: list[str] = []
+        self._filters: list[str] = []
+        self._order_by: list[str] = []
+        self._expand: list[str] = []
+        self._top: int | None = None
+        self._page_size: int | None = None
+        self._window: int | None = None
+        self._workers = 1
+        self._compact = False
+
+    def select(self, *columns: str) -> "ItemQuery[GenericModel]":
+        self._select.extend(escape_column(column) for column in columns)
+        return self
+
+    def filter(self, *expressions: str) -> "ItemQuery[GenericModel]":
+        """Agrega expresiones OData crudas; los nombres de columna deben venir escapados salvo los `.`, que se escapan
+        aqui. Los literales de texto y los numeros no se modifican"""
+        self._filters.extend(f"({escape_filter(expression)})" for expression in expressions)
+        return self
+
+    def where(self, column: str, operator: str, value: Any) -> "ItemQuery[GenericModel]":
+        self._filters.append(f"({escape_column(column)} {operator} {odata_literal(value)})")
+        return self
+
+    def order_by(self, column: str, descending: bool = False) -> "ItemQuery[GenericModel]":
+        self._order_by.append(f"{escape_column(column)} {'desc' if descending else 'asc'}")
+        return self
+
+    def expand(self, *fields: str) -> "ItemQuery[GenericModel]":
+        self._expand.extend(escape_column(field) for field in fields)
+        return self
+
+    def top(self, count: int) -> "ItemQuery[GenericModel]":
+        self._top = count
+        return self
+
+    def page_size(self, size: int) -> "ItemQuery[GenericModel]":
+        self._page_size = size
+        return self
+
+    def by_id_windows(self, window: int = 4000, workers: int = 1) -> "ItemQuery[GenericModel]":
+        """Lee por ventanas de ID para listas sobre el umbral de vistas. Los resultados salen en orden de ID"""
+        self._window = window
+        self._workers = workers
+        return self
+
+    def compact(self) -> "ItemQuery[GenericModel]":
+        """Entrega `CompactRow` (tuplas sobre un header compartido) en vez de validar cada fila. Ignora `model`"""
+        self._compact = True
+        return self
+
+    def params(self) -> dict[str, str]:
+        select = self._select or (list(self._columns) if self._columns is not None else [])
+        params = {}
+        if select:
+            params["$select"] = ",".join(select)
+        if self._filters:
+            params["$filter"] = " and ".join(self._filters)
+        if self._order_by:
+            params["$orderby"] = ",".join(self._order_by)
+        if self._expand:
+            params["$expand"] = ",".join(self._expand)
+        return params
+
+    def iter_pages(self) -> Iterator[list[GenericModel] | list[dict[str, Any]] | list[CompactRow]]:
+        remaining = self._top
+        page_size = self._page_size if remaining is None else min(self._page_size or remaining, remaining)
+        if self._window is not None:
+            pages = self.sp_list.iter_id_windows(self.params(), self._window, self._workers)
+        else:
+            pages = self.sp_list.iter_deferred_data("Items", self.params(), page_size)
+        reader = self.sp_list.compact_reader() if self._compact else None
+        for rows in pages:
+            if remaining is not None:
+                rows = rows[:remaining]
+                remaining -= len(rows)
+            yield reader.page(rows) if reader is not None else [self.convert(row) for row in rows]
+            if remaining is not None and remaining <= 0:
+                return
+
+    def __iter__(self) -> Iterator[GenericModel] | Iterator[dict[str, Any]]:
+        for page in self.iter_pages():
+            yield from page
+
+    def all(self) -> list[GenericModel] | list[dict[str, Any]]:
+        return list(self)
+
+    def convert(self, row: dict) -> GenericModel | dict[str, Any]:
+        if self._columns is None:
+            decode = COLUMN_CODEC.decode
+            return {decode(key): value for key, value in row.items() if key not in METADATA_KEYS}
+        columns = self._columns
+        return self.model.model_validate({columns[key]: value for key, value in row.items() if key in columns})
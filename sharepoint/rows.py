@@ -0,0 +1,93 @@
+from collections.abc import Iterable, Iterator
+from typing import Any, Type, TYPE_CHECKING
+
+from .utils import COLUMN_CODEC, METADATA_KEYS
+
+if TYPE_CHECKING:
+    from .sharepoint import SharePoint, BaseSharePointModel
+
+
+class RowHeader:
+    """Columnas compartidas por todas las filas de una lectura compacta, junto con lo necesario para convertirlas
+    a modelo. Los valores se buscan por nombre decodificado o por nombre interno escapado"""
+    __slots__ = ("keys", "names", "index", "fields", "sharepoint", "source", "model")
+
+    def __init__(self, keys: tuple[str, ...], sharepoint: "SharePoint", source: str,
+                 model: Type["BaseSharePointModel"]):
+        self.keys = keys
+        self.names = tuple(COLUMN_CODEC.decode(key) for key in keys)
+        self.index = {**{key: i for i, key in enumerate(keys)}, **{name: i for i, name in enumerate(self.names)}}
+        self.fields = [(i, name) for i, (key, name) in enumerate(zip(keys, self.names)) if key not in METADATA_KEYS]
+        self.sharepoint = sharepoint
+        self.source = source
+        self.model = model
+
+
+class CompactRow:
+    """Fila cruda como tupla de valores sobre un `RowHeader` compartido. No se valida nada hasta `to_item()`"""
+    __slots__ = ("header", "values")
+
+    def __init__(self, header: RowHeader, values: tuple):
+        self.header = header
+        self.values = values
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[self.header.index[name]]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        index = self.header.index.get(name)
+        return default if index is None else self.values[index]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.header.index
+
+    def __len__(self) -> int:
+        return len(self.header.fields)
+
+    def __repr__(self) -> str:
+        return f"CompactRow({self.as_dict()!r})"
+
+    @property
+    def id(self) -> int | None:
+        return self.get("Id", self.get("ID"))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Columnas decodificadas, sin metadata, igual que `Item.properties`"""
+        values = self.values
+        return {name: values[i] for i, name in self.header.fields}
+
+    def to_item(self) -> "BaseSharePointModel":
+        header = self.header
+        data = dict(zip(header.keys, self.values))
+        return header.model.from_data(data, header.sharepoint, source=header.source, collection=True)
+
+
+class CompactReader:
+    """Convierte paginas de JSON crudo en `CompactRow`, reutilizando el header mientras las columnas no cambien"""
+
+    def __init__(self, sharepoint: "SharePoint", source: str, model: Type["BaseSharePointModel"]):
+        self.sharepoint = sharepoint
+        self.source = source
+        self.model = model
+        self._headers: dict[tuple[str, ...], RowHeader] = {}
+
+    def header(self, keys: tuple[str, ...]) -> RowHeader:
+        header = self._headers.get(keys)
+        if header is None:
+            header = RowHeader(keys, self.sharepoint, self.source, self.model)
+            self._headers[keys] = header
+        return header
+
+    def page(self, rows: Iterable[dict]) -> list[CompactRow]:
+        result = []
+        header = None
+        for row in rows:
+            keys = tuple(row)
+            if header is None or keys != header.keys:
+                header = self.header(keys)
+            result.append(CompactRow(header, tuple(row.values())))
+        return result
+
+    def pages(self, pages: Iterable[list[dict]]) -> Iterator[list[CompactRow]]:
+        for rows in pages:
+            yield self.page(rows)
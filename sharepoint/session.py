@@ -1,16 +1,122 @@
+import threading
 import time
+from email.utils import parsedate_to_datetime
 
 from requests import Session
 from requests.adapters import HTTPAdapter, Retry
 
+from .metrics import RequestEvent, endpoint_template
+
+THROTTLE_STATUS = (429, 503)
+
+
 class SharePointError(Exception):
     ...
 
-def delay_hook(delay_seconds):
-    def delay(r, *args, **kwargs):
-        time.sleep(delay_seconds)
+
+class UploadInterrupted(SharePointError):
+
+    def __init__(self, upload_session, message=None):
+        self.upload_session = upload_session
+        message = message or (f"Upload of {upload_session.file_name} interrupted at offset "
+                              f"{upload_session.offset}/{upload_session.size}")
+        super().__init__(message)
+
+
+class FileChanged(SharePointError):
+    """El archivo cambio en el servidor (otro ETag) mientras se descargaba por rangos"""
+
+    def __init__(self, file_name: str, etag: str | None):
+        self.etag = etag
+        super().__init__(f"{file_name} changed during the download (ETag {etag})")
+
+
+class TokenBucket:
+    """Rate limiter compartido entre threads: permite rafagas de `burst` requests y luego `rate` requests/segundo"""
+
+    def __init__(self, rate: float | None = None, burst: int = 10):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Toma un token, bloqueando solo si el presupuesto esta agotado. Retorna los segundos esperados"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self.rate is not None:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.rate is None:
+                        return waited
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float):
+        """Bloquea a todos los threads durante `seconds` (ej: Retry-After del servidor)"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def retry_after_seconds(r) -> float | None:
+    """Segundos a esperar segun los headers Retry-After o RateLimit-Reset, si vienen"""
+    value = r.headers.get("Retry-After")
+    if value is not None:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    value = r.headers.get("RateLimit-Reset")
+    if value is not None:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+    return None
+
+
+def throttle_hook(session: "SharepointSession"):
+    def throttle(r, *args, **kwargs):
+        # Si el servidor avisa que se agoto el presupuesto, frenar a todos los threads antes del proximo request
+        if r.headers.get("RateLimit-Remaining") == "0":
+            wait = retry_after_seconds(r)
+            if wait:
+                session.rate_limiter.pause(wait)
+
+        attempt = 0
+        throttle_wait = 0.0
+        while r.status_code in THROTTLE_STATUS and attempt < session.num_retries:
+            wait = retry_after_seconds(r)
+            if wait is None:
+                wait = session.backoff_factor * (2 ** attempt)
+            session.rate_limiter.pause(wait)
+            attempt += 1
+
+            # Mismo mecanismo que usa requests en HTTPDigestAuth para reenviar el request
+            r.content
+            r.close()
+            throttle_wait += session.rate_limiter.acquire()
+            retry = r.connection.send(r.request.copy(), **kwargs)
+            retry.history.append(r)
+            retry.request = r.request
+            r = retry
+        r.throttle_wait = throttle_wait
         return r
-    return delay
+    return throttle
+
 
 def rise_status_hoook(r, *args, **kwargs):
     try:
@@ -21,21 +127,91 @@ def rise_status_hoook(r, *args, **kwargs):
         raise SharePointError(str(error)) from e
     return r
 
+
 class SharepointSession(Session):
-    """Modifica request.Session para agregar funcionalidad de esperar entre requests y reintentar en caso de fallar"""
+    """Modifica request.Session para limitar la tasa de requests y reintentar en caso de fallar o de ser throttled"""
 
-    def __init__(self, delay_secs=0.01, num_retries=5, backoff_factor=0.1, status_forcelist=(500, 502, 503, 504),
-                 **kwargs):
+    def __init__(self, delay_secs=0.01, num_retries=5, backoff_factor=0.1, status_forcelist=(500, 502, 504),
+                 requests_per_second=None, burst=10, rate_limiter: TokenBucket = None, pool_size: int = 10, **kwargs):
         super().__init__()
+        self.num_retries = num_retries
+        self.backoff_factor = backoff_factor
+        self.observers = []
+
+        # Limitar la tasa de requests para no sobrecargar el servidor. `delay_secs` se mantiene como 1 / rps
+        if rate_limiter is None:
+            if requests_per_second is None and delay_secs:
+                requests_per_second = 1 / delay_secs
+            rate_limiter = TokenBucket(rate=requests_per_second, burst=burst)
+        self.rate_limiter = rate_limiter
 
-        # Agregar delays en segudos para no sobrecargar el servidor de PreviRed
-        self.hooks['response'].append(delay_hook(delay_secs))
+        # Reintentar respetando Retry-After en 429/503
+        self.hooks['response'].append(throttle_hook(self))
 
         # Agregar auto rise
         self.hooks['response'].append(rise_status_hoook)
 
-        # Configurar retries en caso de requests fallidos
-        retries = Retry(total=num_retries, backoff_factor=backoff_factor, status_forcelist=status_forcelist, **kwargs)
-        adapter = HTTPAdapter(max_retries=retries)
+        # Configurar retries en caso de requests fallidos. Retry-After lo maneja throttle_hook para todos los threads:
+        # si urllib3 lo respetara, los 429 de un GET se reintentarian sin pasar por el rate limiter compartido
+        kwargs["respect_retry_after_header"] = False
+        self.retries = Retry(total=num_retries, backoff_factor=backoff_factor, status_forcelist=status_forcelist,
+                             **kwargs)
+        self.pool_size = 0
+        self.ensure_pool_size(pool_size)
+
+    def ensure_pool_size(self, size: int):
+        """Agranda el pool de conexiones para que `size` threads no esperen ni descarten conexiones"""
+        if size <= self.pool_size:
+            return
+        adapter = HTTPAdapter(max_retries=self.retries, pool_connections=size, pool_maxsize=size)
+        # Cerrar los adapters reemplazados para no dejar sus conexiones abiertas
+        previous = {self.adapters.get(prefix) for prefix in ('http://', 'https://')} - {None}
         self.mount('http://', adapter)
-        self.mount('https://', adapter)
\ No newline at end of file
+        self.mount('https://', adapter)
+        self.pool_size = size
+        for old_adapter in previous:
+            old_adapter.close()
+
+    def add_observer(self, observer):
+        """Registra un callable que recibe un `RequestEvent` por request (y `ValidationEvent` al validar modelos)"""
+        self.observers.append(observer)
+        return observer
+
+    def remove_observer(self, observer):
+        self.observers.remove(observer)
+
+    def emit(self, event):
+        for observer in self.observers:
+            observer(event)
+
+    def send(self, request, **kwargs):
+        waited = self.rate_limiter.acquire()
+        if not self.observers:
+            return super().send(request, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except SharePointError as e:
+            response = getattr(e.__cause__, "response", None)
+            if response is not None:
+                self._record(request, response, start, waited, kwargs.get("stream", False))
+            raise
+        self._record(request, response, start, waited, kwargs.get("stream", False))
+        return response
+
+    def _record(self, request, response, start, waited, stream):
+        body = request.body or b""
+        if stream:
+            bytes_in = int(response.headers.get("Content-Length") or 0)
+        else:
+            bytes_in = len(response.content)
+        # Reintentos de urllib3 (5xx) mas los reenvios por throttling de throttle_hook
+        retries = len(response.history)
+        raw_retries = getattr(response.raw, "retries", None)
+        if raw_retries is not None:
+            retries += len(raw_retries.history)
+        self.emit(RequestEvent(method=request.method, endpoint=endpoint_template(request.url),
+                               status=response.status_code, latency=time.perf_counter() - start,
+                               bytes_out=len(body), bytes_in=bytes_in, retries=retries,
+                               throttle_wait=waited + getattr(response, "throttle_wait", 0.0)))
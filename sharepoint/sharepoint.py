@@ -1,30 +1,70 @@
-from typing import Optional, Any, Type, TypeVar
+import io
+import mmap
+import os
+import threading
+import time
+from collections.abc import Iterator, Iterable
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from fnmatch import fnmatch
+from itertools import islice
+from pathlib import Path
+from typing import Optional, Any, Type, TypeVar, ClassVar, BinaryIO
 
 import requests
-from pydantic import BaseModel, model_validator, Field, ConfigDict
-
-
-from .models import TokenData
-from .session import SharepointSession
-from .utils import replace_string_map, replace_key_mapping, to_camel, COLUMN_ESCAPE, AUTO_LIST_FIELDS, \
-    AUTO_ITEM_PROPERTIES
-
+from pydantic import BaseModel, model_validator, Field, ConfigDict, PrivateAttr, ValidationInfo
+
+
+from .auth import TokenProvider
+from .batch import BatchOperation, BatchResult, send_batch
+from .cache import ResponseCache
+from .changes import ChangeSet, ChangeType, change_query, is_invalid_token_error
+from .export import export_list
+from .file_cache import FileCache
+from .metrics import ValidationEvent, endpoint_template
+from .models import TokenData, UploadSession, UploadResult, SchemaChanges
+from .parse_pydantic import model_plan, pydantic_to_sharepoint
+from .query import ItemQuery, escape_filter
+from .rows import CompactReader, CompactRow
+from .session import SharepointSession, SharePointError, UploadInterrupted, FileChanged
+from .sync import SyncReport, SYNC_WORKERS, sync_from, sync_to
+from .utils import to_camel, chunked, open_source, source_size, page_results, page_next, COLUMN_CODEC, \
+    AUTO_LIST_FIELDS, AUTO_ITEM_PROPERTIES
+
+BASE_URL = "https://puentesur.sharepoint.com"
+LOGIN_URL = "https://login.microsoftonline.com"
+CHUNK_SIZE = 10 * 1024 * 1024
+UPLOAD_WORKERS = 8
+ID_WINDOW = 4000  # Menor al umbral de 5000 items de las vistas
 HEADERS = {"accept": "application/json;odata=verbose", "content-type": "application/json;odata=verbose",
            "IF-MATCH": "*"}
+NOMETADATA_WRITE_HEADERS = {"content-type": "application/json;odata=nometadata"}
+ODATA_MODES = ("verbose", "minimalmetadata", "nometadata")
 
 
 class SharePoint:
 
     def __init__(self, client_id: str, tenant_id: str, secret: str, domain: str, site: str,
-                 session: requests.Session = None):
+                 session: requests.Session = None, odata: str = "verbose", base_url: str = BASE_URL,
+                 login_url: str = LOGIN_URL, cache: ResponseCache = None, token_provider: TokenProvider = None,
+                 file_cache: FileCache = None):
+        if odata not in ODATA_MODES:
+            raise ValueError(f"odata must be one of {ODATA_MODES}, got {odata!r}")
         self.site = site
+        self.odata = odata
+        self.base_url = base_url.rstrip("/")
+        self.login_url = login_url.rstrip("/")
         self.domain = domain
         self.secret = secret
         self.client_id = client_id
         self.tenant_id = tenant_id
+        self.cache = cache
+        self.file_cache = file_cache
         self._session = session if session is not None else SharepointSession()
-        self._access_token: Optional[TokenData] = None
-        self._session.headers.update(HEADERS)
+        if token_provider is None:
+            token_provider = TokenProvider.shared(self.token_url, self.client_id_data, secret, self.resource)
+        self.token_provider = token_provider
+        self._session.headers.update({**HEADERS, "accept": f"application/json;odata={odata}"})
 
     @property
     def client_id_data(self):
@@ -35,12 +75,12 @@ class SharePoint:
         return f"00000003-0000-0ff1-ce00-000000000000/{self.domain}@{self.tenant_id}"
 
     @property
-    def access_token(self):
-        token_data = self._access_token
-        if token_data is None or token_data.is_expired():
-            token_data = self.get_auth_token()
-            self._access_token = token_data
-        return token_data
+    def token_url(self):
+        return f"{self.login_url}/{self.tenant_id}/tokens/oAuth/2"
+
+    @property
+    def access_token(self) -> TokenData:
+        return self.token_provider.token()
 
     @property
     def session(self):
@@ -50,12 +90,72 @@ class SharePoint:
 
     @property
     def api(self):
-        return f"https://puentesur.sharepoint.com/sites/{self.site}/_api/web"
+        return f"{self.base_url}/sites/{self.site}/_api/web"
+
+    @property
+    def api_root(self):
+        return self.api.removesuffix("/web")
+
+    @property
+    def batch_api(self):
+        return self.api_root + "/$batch"
+
+    @property
+    def observed(self) -> bool:
+        return bool(getattr(self._session, "observers", None))
+
+    def emit(self, event):
+        """Reenvia un evento a los observadores de la sesion, si la sesion los soporta"""
+        emit = getattr(self._session, "emit", None)
+        if emit is not None:
+            emit(event)
+
+    def response_data(self, response) -> dict:
+        """Cuerpo JSON de la respuesta; en modo verbose viene envuelto en `d`"""
+        data = response.json()
+        return data["d"] if self.odata == "verbose" else data
+
+    def cached_data(self, url: str, params: dict = None) -> dict:
+        """GET de metadata a traves de `cache`: revalida con If-None-Match y en un 304 usa el JSON guardado"""
+        cache = self.cache
+        if cache is None:
+            return self.response_data(self.session.get(url, params=params))
+        key = cache.key(url, params)
+        entry = cache.get(key)
+        if entry is not None and cache.max_age and entry.is_fresh(cache.max_age):
+            return entry.data
+        headers = {"If-None-Match": entry.etag} if entry is not None and entry.etag else None
+        response = self.session.get(url, params=params, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            cache.touch(key)
+            return entry.data
+        data = self.response_data(response)
+        etag = response.headers.get("ETag")
+        if etag is not None or cache.max_age:
+            metadata = data.get("__metadata") or {}
+            edit_link = data.get("odata.editLink")
+            tags = [url, metadata.get("uri") or (f"{self.api_root}/{edit_link}" if edit_link else url)]
+            cache.set(key, etag, data, tags)
+        return data
+
+    def invalidate(self, uri: str) -> None:
+        """Descarta del cache las respuestas de `uri` y sus hijos. Lo llaman las escrituras de la libreria"""
+        if self.cache is not None:
+            self.cache.invalidate(uri)
+
+    def batch(self, operations: Iterable[BatchOperation], batch_size: int = 100) -> list[BatchResult]:
+        """Envia las operaciones en requests $batch de a `batch_size`, manteniendo el indice global de cada una"""
+        results = []
+        for chunk in chunked(operations, batch_size):
+            offset = len(results)
+            for result in send_batch(self.session, self.batch_api, chunk):
+                result.index += offset
+                results.append(result)
+        return results
 
     def get_folder(self, path: str):
         url = self.api + f"/GetFolderByServerRelativeUrl('{path}')"
-        response = self.session.get(url)
-        data = response.json()['d']
+        data = self.cached_data(url)
         folder = Folder(**data, sharepoint=self)
         return folder
 
@@ -63,34 +163,26 @@ class SharePoint:
     def root_folder(self):
         return self.get_folder('Shared Documents')
 
-    def get_auth_token(self):
-        url = f"https://login.microsoftonline.com/{self.tenant_id}/tokens/oAuth/2"
-        data = {"grant_type": "client_credentials",
-                "client_id": self.client_id_data,
-                "client_secret": self.secret,
-                "resource": self.resource}
+    def walk(self, path: str, **kwargs):
+        return self.get_folder(path).walk(**kwargs)
 
-        response = requests.get(url, data=data)
-        token_json = response.json()
-        expire_in = int(token_json["expires_in"])
-        access_token = token_json["access_token"]
-        token_data = TokenData(expire_in=expire_in, access_token=access_token)
-        return token_data
+    def get_auth_token(self) -> TokenData:
+        """Fuerza la renovacion del token compartido"""
+        return self.token_provider.refresh(self.token_provider.current)
 
 
 
     def get_list(self, title):
         url = self.api + f"/lists/GetByTitle('{title}')"
-        response = self.session.get(url)
-        data = response.json()["d"]
+        data = self.cached_data(url)
         list_ = List(**data, sharepoint=self)
         return list_
 
     def get_all_lists(self):
         url = self.api + f"/lists/?$filter=Hidden eq false and IsCatalog eq false"
         response = self.session.get(url)
-        data = response.json()["d"]
-        results = data["results"]
+        data = self.response_data(response)
+        results = page_results(data)
         lists = [List(**list_, sharepoint=self) for list_ in results]
         return lists
 
@@ -109,7 +201,8 @@ class SharePoint:
         if description is not None:
             payload["Description"] = description
         response = self.session.post(url, json=payload)
-        data = response.json()["d"]
+        self.invalidate(url)
+        data = self.response_data(response)
         list_ = List(**data, sharepoint=self)
         if title_field_not_required:
             title_field = list_.get_field_by_static_name("Title")
@@ -125,8 +218,9 @@ GenericModel = TypeVar('GenericModel', bound=BaseModel)
 class BaseSharePointModel(BaseModel):
     deferred: dict[str, str] = Field(..., repr=False)
     uri: str
-    type: str
+    type: Optional[str]
     sharepoint: SharePoint = Field(..., repr=False)
+    odata_type: ClassVar[Optional[str]] = None
 
     model_config = ConfigDict(
         alias_generator=to_camel,
@@ -135,11 +229,24 @@ class BaseSharePointModel(BaseModel):
 
     @model_validator(mode='before')
     @classmethod
-    def construct_values(cls, values: dict):
+    def construct_values(cls, values: dict, info: ValidationInfo):
         result = {}
-        values["Sharepoint"] = values.pop("sharepoint")
-        values["Uri"] = values["__metadata"]["uri"]
-        values["Type"] = values["__metadata"]["type"]
+        sharepoint = values.pop("sharepoint")
+        values["Sharepoint"] = sharepoint
+        metadata = values.get("__metadata")
+        if metadata is not None:
+            values["Uri"] = metadata["uri"]
+            values["Type"] = metadata["type"]
+        else:
+            # odata=minimalmetadata trae editLink relativo a _api; odata=nometadata obliga a derivar la uri
+            edit_link = values.get("odata.editLink")
+            if edit_link is not None:
+                values["Uri"] = f"{sharepoint.api_root}/{edit_link}"
+            else:
+                context = info.context or {}
+                values["Uri"] = cls.derive_uri(values, sharepoint, context.get("source"),
+                                               context.get("collection", False))
+            values["Type"] = values.get("odata.type", cls.odata_type)
         for key, value in values.items():
             try:
                 deferred = value["__deferred"]
@@ -150,50 +257,289 @@ class BaseSharePointModel(BaseModel):
         values["Deferred"] = result
         return values
 
-    def get_deferred_item(self, deferred_field: str, model: Type[GenericModel], params: dict = None) -> GenericModel:
+    @classmethod
+    def derive_uri(cls, values: dict, sharepoint: SharePoint, source: str | None, collection: bool) -> str:
+        """Uri de la entidad cuando la respuesta no trae `__metadata`, a partir de la url desde donde se leyo"""
+        if source is None:
+            raise ValueError(f"Cannot derive the uri of a {cls.__name__} without response metadata")
+        if not collection:
+            return source
+        source = source.split("?")[0]
+        key = values["Id"]
+        return f"{source}({key})" if isinstance(key, int) else f"{source}(guid'{key}')"
+
+    @classmethod
+    def from_data(cls, data: dict, sharepoint: SharePoint, source: str = None, collection: bool = False):
+        return cls.model_validate({**data, "sharepoint": sharepoint},
+                                  context={"source": source, "collection": collection})
+
+    def deferred_uri(self, deferred_field: str) -> str:
+        return self.deferred.get(deferred_field) or f"{self.uri}/{deferred_field}"
+
+    def patch(self, data: dict) -> None:
+        data = COLUMN_CODEC.encode_keys(data)
+        if self.type is None:
+            self.sharepoint.session.patch(self.uri, json=data, headers=NOMETADATA_WRITE_HEADERS)
+        else:
+            payload = {**data,
+                       "__metadata": {"type": self.type}
+                       }
+            self.sharepoint.session.patch(self.uri, json=payload)
+        self.sharepoint.invalidate(self.uri)
+
+    def get_deferred_item(self, deferred_field: str, model: Type[GenericModel], params: dict = None,
+                          cached: bool = False) -> GenericModel:
         params = {} if params is None else params
-        url = self.deferred[deferred_field]
-        response = self.sharepoint.session.get(url, params=params)
-        data = response.json()["d"]
-        result = model(**data, sharepoint=self.sharepoint)
+        url = self.deferred_uri(deferred_field)
+        if cached:
+            data = self.sharepoint.cached_data(url, params)
+        else:
+            data = self.sharepoint.response_data(self.sharepoint.session.get(url, params=params))
+        result = model.from_data(data, self.sharepoint, source=url)
         return result
 
-    def get_deferred_items(self, deferred_field: str, model: Type[GenericModel], params: dict = None) -> list[
-        GenericModel]:
-        params = {} if params is None else params
-        url = self.deferred[deferred_field]
-        response = self.sharepoint.session.get(url, params=params)
-        results = []
-        data = response.json()["d"]
-        results.extend(data["results"])
-        while next_url := data.get("__next"):
-            response = self.sharepoint.session.get(next_url)
-            data = response.json()["d"]
-            results.extend(data["results"])
-        items = [model(**item, sharepoint=self.sharepoint) for item in results]
+    def iter_deferred_data(self, deferred_field: str, params: dict = None, page_size: int = None,
+                           cached: bool = False) -> Iterator[list[dict]]:
+        """Sigue los links `__next` y entrega el JSON crudo de cada pagina, sin acumular las anteriores.
+        Con `cached` la primera pagina pasa por el cache de respuestas"""
+        params = {} if params is None else dict(params)
+        if page_size is not None:
+            params["$top"] = page_size
+        url = self.deferred_uri(deferred_field)
+        if cached:
+            data = self.sharepoint.cached_data(url, params)
+        else:
+            data = self.sharepoint.response_data(self.sharepoint.session.get(url, params=params))
+        while True:
+            next_url = page_next(data)
+            yield page_results(data)
+            if not next_url:
+                return
+            data = self.sharepoint.response_data(self.sharepoint.session.get(next_url))
+
+    def iter_deferred_pages(self, deferred_field: str, model: Type[GenericModel], params: dict = None,
+                            page_size: int = None, cached: bool = False) -> Iterator[list[GenericModel]]:
+        url = self.deferred_uri(deferred_field)
+        for results in self.iter_deferred_data(deferred_field, params, page_size, cached):
+            if not self.sharepoint.observed:
+                yield [model.from_data(item, self.sharepoint, source=url, collection=True) for item in results]
+                continue
+            start = time.perf_counter()
+            page = [model.from_data(item, self.sharepoint, source=url, collection=True) for item in results]
+            self.sharepoint.emit(ValidationEvent(endpoint=endpoint_template(url), model=model.__name__,
+                                                 rows=len(page), seconds=time.perf_counter() - start))
+            yield page
+
+    def iter_deferred_items(self, deferred_field: str, model: Type[GenericModel], params: dict = None,
+                            page_size: int = None, cached: bool = False) -> Iterator[GenericModel]:
+        for page in self.iter_deferred_pages(deferred_field, model, params, page_size, cached):
+            yield from page
+
+    def get_deferred_items(self, deferred_field: str, model: Type[GenericModel], params: dict = None,
+                           cached: bool = False) -> list[GenericModel]:
+        items = list(self.iter_deferred_items(deferred_field, model, params, cached=cached))
         return items
 
 
 class File(BaseSharePointModel):
     name: str
     time_created: str
+    length: Optional[int] = None
+    server_relative_url: Optional[str] = None
+    time_last_modified: Optional[str] = None
+    unique_id: Optional[str] = None
+    etag: Optional[str] = Field(None, alias="ETag")
+    odata_type: ClassVar[str] = "SP.File"
+
+    @classmethod
+    def derive_uri(cls, values: dict, sharepoint: SharePoint, source: str | None, collection: bool) -> str:
+        return sharepoint.api + f"/GetFileByServerRelativeUrl('{values['ServerRelativeUrl']}')"
 
     def download(self):
+        if self.sharepoint.file_cache is not None:
+            with self._open_cached() as stream:
+                return stream.read()
         url = self.uri + "/$value"
         file_data = self.sharepoint.session.get(url)
         return file_data.content
 
+    def cached_path(self, validate: bool = True) -> Path:
+        """Ruta al contenido en `SharePoint.file_cache`. Si ya esta en cache se valida con un GET condicional
+        (If-None-Match), que no trae el contenido si el archivo no cambio. Con `validate=False` se confia en el ETag
+        de la metadata y no se hace ningun request. Otro proceso puede descartar la ruta en cualquier momento; para
+        leer el contenido usar `download()` o `cached_mmap()`"""
+        entry = self._cached_entry(validate)
+        if isinstance(entry, bytes):
+            raise ValueError(f"Cannot cache {self.name}: the server sent no ETag")
+        return entry
+
+    def cached_mmap(self, validate: bool = True) -> mmap.mmap:
+        """Contenido en cache mapeado en memoria (solo lectura), sin copiarlo. No aplica a archivos vacios"""
+        with self._open_cached(validate) as stream:
+            if isinstance(stream, io.BytesIO):
+                raise ValueError(f"Cannot cache {self.name}: the server sent no ETag")
+            return mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _cached_entry(self, validate: bool = True) -> Path | bytes:
+        """Ruta validada en cache o, si no hay ETag con que direccionarlo, el contenido descargado sin cachear"""
+        cache = self.sharepoint.file_cache
+        if cache is None:
+            raise ValueError("cached_path requires SharePoint(file_cache=FileCache(...))")
+        identity = self.unique_id or self.uri
+        path = cache.get(identity, self.etag)
+        if path is not None and not validate:
+            return path
+        headers = {"If-None-Match": self.etag} if path is not None else None
+        with self.sharepoint.session.get(self.uri + "/$value", headers=headers, stream=True) as response:
+            if response.status_code == 304:
+                return path
+            etag = response.headers.get("ETag") or self.etag
+            if etag is None:
+                return response.content
+            new_path = cache.put(identity, etag, response.iter_content(CHUNK_SIZE))
+        if etag != self.etag:
+            cache.discard(identity, self.etag)
+            self.etag = etag
+        return new_path
+
+    def _open_cached(self, validate: bool = True) -> BinaryIO:
+        """Abre el contenido en cache. Si otro proceso lo descarta entre la validacion y la apertura, se descarga de
+        nuevo una vez. Sin ETag se entrega el contenido en memoria"""
+        for attempt in range(2):
+            entry = self._cached_entry(validate)
+            if isinstance(entry, bytes):
+                return io.BytesIO(entry)
+            try:
+                return open(entry, "rb")
+            except FileNotFoundError:
+                if attempt:
+                    raise
+
+    def iter_content(self, chunk_size: int = CHUNK_SIZE, start: int = 0, end: int = None,
+                     if_range: str = None) -> Iterator[bytes]:
+        """Descarga en streaming los bytes [start, end] (inclusive) sin cargar el archivo completo en memoria.
+        Con `if_range` (un ETag) el rango solo se entrega si el archivo no cambio; si cambio se lanza `FileChanged`"""
+        url = self.uri + "/$value"
+        headers = {}
+        if start or end is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+            if if_range is not None:
+                headers["If-Range"] = if_range
+        with self.sharepoint.session.get(url, headers=headers, stream=True) as response:
+            if "If-Range" in headers and response.status_code != 206:
+                raise FileChanged(self.name, response.headers.get("ETag"))
+            # Si el servidor ignora el Range (200 en vez de 206) se recorta localmente
+            position = start if response.status_code == 206 else 0
+            for chunk in response.iter_content(chunk_size):
+                chunk_start, position = position, position + len(chunk)
+                if position <= start:
+                    continue
+                if end is not None and chunk_start > end:
+                    break
+                chunk = chunk[max(0, start - chunk_start):]
+                chunk_start = max(chunk_start, start)
+                if end is not None:
+                    chunk = chunk[:end + 1 - chunk_start]
+                yield chunk
+
+    def download_to(self, destination, chunk_size: int = CHUNK_SIZE, resume: bool = True,
+                    workers: int = 1) -> int:
+        """Descarga a una ruta o file-like escribiendo por partes. Si `destination` es una ruta con una descarga
+        parcial, la retoma con un Range condicionado al ETag (If-Range): si el archivo cambio se descarga completo de
+        nuevo. Con `workers` > 1 descarga rangos en paralelo. Retorna los bytes escritos"""
+        if not isinstance(destination, (str, os.PathLike)):
+            return self._write_range(destination, chunk_size)
+        if workers > 1 and self.length is not None and self.etag is not None:
+            return self._download_parallel(destination, chunk_size, workers)
+        start = os.path.getsize(destination) if resume and os.path.exists(destination) else 0
+        if self.etag is None or (self.length is not None and start > self.length):
+            # Sin ETag no se puede verificar que lo descargado sea de la misma version
+            start = 0
+        if not start:
+            return self._download_full(destination, chunk_size)
+        return self._resume(destination, chunk_size, start)
+
+    def _resume(self, destination, chunk_size: int, start: int) -> int:
+        # Si el archivo local ya esta completo se pide el ultimo byte: un 206 confirma que no cambio
+        range_start = start - 1 if start == self.length else start
+        headers = {"Range": f"bytes={range_start}-", "If-Range": self.etag}
+        written = 0
+        with self.sharepoint.session.get(self.uri + "/$value", headers=headers, stream=True) as response, \
+                open(destination, "r+b") as stream:
+            if response.status_code == 206:
+                stream.seek(range_start)
+                written -= start - range_start
+            else:
+                # 200: el archivo cambio desde la descarga parcial y viene completo
+                stream.truncate(0)
+                self.etag = response.headers.get("ETag", self.etag)
+            for chunk in response.iter_content(chunk_size):
+                stream.write(chunk)
+                written += len(chunk)
+            stream.truncate()
+            if response.status_code != 206:
+                self.length = written
+        return written
+
+    def _download_full(self, destination, chunk_size: int) -> int:
+        written = 0
+        with self.sharepoint.session.get(self.uri + "/$value", stream=True) as response, \
+                open(destination, "wb") as stream:
+            for chunk in response.iter_content(chunk_size):
+                stream.write(chunk)
+                written += len(chunk)
+            self.etag = response.headers.get("ETag", self.etag)
+        self.length = written
+        return written
+
+    def _write_range(self, stream, chunk_size: int, start: int = 0, end: int = None, if_range: str = None) -> int:
+        written = 0
+        for chunk in self.iter_content(chunk_size, start, end, if_range):
+            stream.write(chunk)
+            written += len(chunk)
+        return written
+
+    def _download_parallel(self, destination, chunk_size: int, workers: int) -> int:
+        """Cada rango va condicionado al ETag, para no unir partes de dos versiones del archivo"""
+        part_size = max(chunk_size, -(-self.length // workers))
+        with open(destination, "wb") as stream:
+            stream.truncate(self.length)
+
+        def download_part(start):
+            end = min(start + part_size, self.length) - 1
+            with open(destination, "r+b") as part:
+                part.seek(start)
+                return self._write_range(part, chunk_size, start, end, if_range=self.etag)
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return sum(executor.map(download_part, range(0, self.length, part_size)))
+        except FileChanged:
+            # El archivo cambio durante la descarga: se descarga de nuevo completo en un solo request
+            return self._download_full(destination, chunk_size)
+
     @property
     def list_item(self):
         item = self.get_deferred_item(deferred_field='ListItemAllFields', model=Item)
         return item
 
+    def delete(self):
+        self.sharepoint.session.delete(self.uri)
+        if self.server_relative_url is not None:
+            folder_path = self.server_relative_url.rsplit("/", 1)[0]
+            self.sharepoint.invalidate(self.sharepoint.api + f"/GetFolderByServerRelativeUrl('{folder_path}')")
+
 
 class Folder(BaseSharePointModel):
     name: str
     time_created: str
     item_count: int
     server_relative_url: str
+    odata_type: ClassVar[str] = "SP.Folder"
+
+    @classmethod
+    def derive_uri(cls, values: dict, sharepoint: SharePoint, source: str | None, collection: bool) -> str:
+        return sharepoint.api + f"/GetFolderByServerRelativeUrl('{values['ServerRelativeUrl']}')"
 
     @property
     def files(self) -> list[File]:
@@ -205,18 +551,190 @@ class Folder(BaseSharePointModel):
         items = self.get_deferred_items("Folders", Folder)
         return items
 
-    def upload_file(self, file_name, content) -> File:
-        url = self.uri + f"/Files/add(url='{file_name}',overwrite=true)"
-        response = self.sharepoint.session.post(url, data=content)
-        file = response.json()["d"]
+    # Files y Folders no se paginan con `__next`: un $top recortaria el resultado, asi que se piden completos
+    def iter_files(self) -> Iterator[File]:
+        return self.iter_deferred_items("Files", File)
+
+    def iter_folders(self) -> Iterator["Folder"]:
+        return self.iter_deferred_items("Folders", Folder)
+
+    def walk(self, max_workers: int = 8, max_depth: int = None, include: list[str] = None,
+             exclude: list[str] = None) -> Iterator[tuple["Folder", list["Folder"], list[File]]]:
+        """Recorre el arbol como `os.walk`, listando varias carpetas en paralelo. Entrega (carpeta, subcarpetas,
+        archivos) a medida que se completan. `include` filtra archivos y `exclude` poda carpetas (patrones glob).
+        Al igual que `os.walk`, se puede modificar la lista de subcarpetas para no descender en ellas"""
+
+        def list_folder(folder):
+            files = folder.files
+            if include is not None:
+                files = [file for file in files if any(fnmatch(file.name, pattern) for pattern in include)]
+            return folder.folders, files
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {executor.submit(list_folder, self): (self, 0)}
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        folder, depth = pending.pop(future)
+                        subfolders, files = future.result()
+                        if exclude is not None:
+                            subfolders = [sub for sub in subfolders
+                                          if not any(fnmatch(sub.name, pattern) for pattern in exclude)]
+                        yield folder, subfolders, files
+                        if max_depth is not None and depth >= max_depth:
+                            continue
+                        for subfolder in subfolders:
+                            pending[executor.submit(list_folder, subfolder)] = (subfolder, depth + 1)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    @property
+    def is_list_root(self) -> bool:
+        """La carpeta es la raiz de una lista o biblioteca, que no tiene item asociado"""
+        try:
+            response = self.sharepoint.session.get(self.uri + "/ListItemAllFields", params={"$select": "Id"})
+        except SharePointError:
+            return True
+        data = self.sharepoint.response_data(response) or {}
+        return data.get("Id", data.get("ID")) is None
+
+    @property
+    def parent_list(self) -> "List":
+        try:
+            response = self.sharepoint.session.get(self.uri + "/ListItemAllFields/ParentList")
+        except SharePointError:
+            # La carpeta raiz de una biblioteca no tiene item asociado
+            url = self.sharepoint.api + f"/GetList('{self.server_relative_url}')"
+            response = self.sharepoint.session.get(url)
+        return List(**self.sharepoint.response_data(response), sharepoint=self.sharepoint)
+
+    def get_changes(self, token: str | None) -> ChangeSet:
+        """Cambios de la biblioteca desde `token`, limitando agregados y actualizados a esta carpeta.
+        Los eliminados no traen ruta, por lo que se reportan todos los de la biblioteca"""
+        changes = self.parent_list.get_changes(token, params={"$select": "*,FileRef"})
+        prefix = self.server_relative_url.rstrip("/") + "/"
+        changes.added = [item for item in changes.added if item.properties.get("FileRef", "").startswith(prefix)]
+        changes.updated = [item for item in changes.updated if item.properties.get("FileRef", "").startswith(prefix)]
+        return changes
+
+    def sync(self, store) -> ChangeSet:
+        changes = self.get_changes(store.get(self.server_relative_url))
+        store.set(self.server_relative_url, changes.token)
+        return changes
+
+    def upload_file(self, file_name, content, chunk_size: int = CHUNK_SIZE) -> File:
+        """Sube `content` (str, bytes, `Path` o file-like). Archivos mayores a `chunk_size` se suben por partes"""
+        with open_source(content) as stream:
+            if source_size(stream) > chunk_size:
+                return self.upload_large_file(file_name, stream, chunk_size)
+            url = self.uri + f"/Files/add(url='{file_name}',overwrite=true)"
+            response = self.sharepoint.session.post(url, data=stream.read())
+            self.sharepoint.invalidate(self.uri)
+        file = self.sharepoint.response_data(response)
         return File(**file, sharepoint=self.sharepoint)
 
+    def upload_many(self, files: Iterable[tuple[str, Any, dict | None]], workers: int = UPLOAD_WORKERS,
+                    chunk_size: int = CHUNK_SIZE, parent_list: "List" = None) -> list[UploadResult]:
+        """Sube muchos archivos en paralelo. `files` entrega (nombre, contenido, metadata o None); la metadata se
+        escribe directo en ListItemAllFields sin leer el item. Un error no detiene al resto: queda en el
+        `UploadResult` del archivo. Los resultados vienen en el orden de entrada"""
+        ensure_pool_size = getattr(self.sharepoint._session, "ensure_pool_size", None)
+        if ensure_pool_size is not None:
+            ensure_pool_size(workers)
+        entity_type = parent_list.entity_type if parent_list is not None else None
+        lock = threading.Lock()
+
+        def upload(index, name, content, metadata):
+            nonlocal entity_type
+            try:
+                file = self.upload_file(name, content, chunk_size)
+                if metadata:
+                    with lock:
+                        if entity_type is None:
+                            entity_type = self.parent_list.entity_type
+                    payload = {**COLUMN_CODEC.encode_keys(metadata), "__metadata": {"type": entity_type}}
+                    self.sharepoint.session.patch(file.uri + "/ListItemAllFields", json=payload)
+                return UploadResult(index=index, name=name, file=file)
+            except (requests.RequestException, SharePointError, OSError) as e:
+                return UploadResult(index=index, name=name, error=str(e))
+
+        results = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Se mantienen pocas subidas en vuelo para no abrir miles de archivos ni acumular futures
+            pending = set()
+            for index, (name, content, metadata) in enumerate(files):
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    results.extend(future.result() for future in done)
+                pending.add(executor.submit(upload, index, name, content, metadata))
+            results.extend(future.result() for future in pending)
+        results.sort(key=lambda result: result.index)
+        return results
+
+    def upload_large_file(self, file_name, content, chunk_size: int = CHUNK_SIZE,
+                          upload_session: UploadSession = None, max_attempts: int = 3) -> File:
+        """Sube por partes con StartUpload/ContinueUpload/FinishUpload. Si falla se lanza `UploadInterrupted`,
+        cuyo `upload_session` se puede pasar de vuelta para retomar desde el ultimo offset confirmado"""
+        with open_source(content) as stream:
+            start = stream.tell()
+            if upload_session is None:
+                file = self.upload_file(file_name, b"")
+                upload_session = UploadSession(file_name=file_name, file_uri=file.uri, size=source_size(stream))
+            while True:
+                for attempt in range(max_attempts):
+                    stream.seek(start + upload_session.offset)
+                    chunk = stream.read(chunk_size)
+                    try:
+                        data = self._upload_chunk(upload_session, chunk)
+                        break
+                    except (requests.RequestException, SharePointError) as e:
+                        if attempt + 1 == max_attempts:
+                            raise UploadInterrupted(upload_session) from e
+                if data is not None:
+                    return File(**data, sharepoint=self.sharepoint)
+
+    def _upload_chunk(self, upload_session: UploadSession, chunk: bytes) -> dict | None:
+        """Sube una parte y avanza el offset confirmado. Retorna los datos del archivo al terminar"""
+        upload_id = f"uploadId=guid'{upload_session.upload_id}'"
+        end = upload_session.offset + len(chunk)
+        if upload_session.offset == 0:
+            method = "StartUpload"
+            url = upload_session.file_uri + f"/StartUpload({upload_id})"
+        elif end >= upload_session.size:
+            method = "FinishUpload"
+            url = upload_session.file_uri + f"/FinishUpload({upload_id},fileOffset={upload_session.offset})"
+        else:
+            method = "ContinueUpload"
+            url = upload_session.file_uri + f"/ContinueUpload({upload_id},fileOffset={upload_session.offset})"
+        response = self.sharepoint.session.post(url, data=chunk)
+        data = self.sharepoint.response_data(response)
+        if method == "FinishUpload":
+            upload_session.offset = end
+            return data
+        upload_session.offset = int(data[method])
+        return None
+
     def get_file(self, name: str) -> File:
-        files = self.files
-        for file in files:
-            if file.name == name:
-                return file
-        raise KeyError(f"File with name {name} not found.")
+        url = self.sharepoint.api + f"/GetFileByServerRelativeUrl('{self.server_relative_url}/{name}')"
+        try:
+            response = self.sharepoint.session.get(url)
+        except SharePointError as e:
+            if "not found" not in str(e).lower():
+                raise
+            raise KeyError(f"File with name {name} not found.") from None
+        return File(**self.sharepoint.response_data(response), sharepoint=self.sharepoint)
+
+    def sync_from(self, local_dir, delete: bool = False, dry_run: bool = False,
+                  workers: int = SYNC_WORKERS) -> SyncReport:
+        """Sube los archivos locales nuevos o modificados segun el manifest de `local_dir`. Ver `sync.sync_from`"""
+        return sync_from(self, local_dir, delete, dry_run, workers)
+
+    def sync_to(self, local_dir, delete: bool = False, dry_run: bool = False,
+                workers: int = SYNC_WORKERS) -> SyncReport:
+        """Descarga los archivos remotos nuevos o modificados a `local_dir`. Ver `sync.sync_to`"""
+        return sync_to(self, local_dir, delete, dry_run, workers)
 
     def create_folder(self, name: str):
         url = self.sharepoint.api + "/folders"
@@ -224,7 +742,8 @@ class Folder(BaseSharePointModel):
                 "ServerRelativeUrl": f"{self.server_relative_url}/{name}"
                 }
         response = self.sharepoint.session.post(url, json=data)
-        data = response.json()["d"]
+        self.sharepoint.invalidate(self.uri)
+        data = self.sharepoint.response_data(response)
         folder = Folder(**data, sharepoint=self.sharepoint)
         return folder
 
@@ -238,10 +757,10 @@ class Item(BaseSharePointModel):
     @classmethod
     def properties_user_created(cls, values: dict):
         result = {}
+        decode = COLUMN_CODEC.decode
         for key, value in values.items():
             if key not in AUTO_ITEM_PROPERTIES:
-                key = replace_string_map(key, COLUMN_ESCAPE, reverse=True)
-                result[key] = value
+                result[decode(key)] = value
         values["__UserCreatedProperties"] = result
         return values
 
@@ -251,14 +770,12 @@ class Item(BaseSharePointModel):
         return item
 
     def update(self, data) -> None:
-        data = replace_key_mapping(data, COLUMN_ESCAPE)
-        payload = {**data,
-                   "__metadata": {"type": self.type}
-                   }
-        self.sharepoint.session.patch(self.uri, json=payload)
+        self.patch(data)
 
     def delete(self):
         self.sharepoint.session.delete(self.uri)
+        # La uri del item cuelga de la lista: lists(guid'...')/Items(id)
+        self.sharepoint.invalidate(self.uri.rsplit("/", 1)[0])
 
 
 class ListField(BaseSharePointModel):
@@ -271,13 +788,35 @@ class ListField(BaseSharePointModel):
     default_value: Any
     custom_formatter: Optional[str]
     field_type: str = Field(..., alias="TypeAsString")
+    field_type_kind: Optional[int] = None
+    choices: Optional[Any] = None
+    _parent_list: Optional["List"] = PrivateAttr(default=None)
+
+    @property
+    def choice_values(self) -> list[str] | None:
+        # odata=verbose envuelve las colecciones en {"results": [...]}
+        choices = self.choices
+        return choices.get("results") if isinstance(choices, dict) else choices
 
     def update(self, data) -> None:
-        data = replace_key_mapping(data, COLUMN_ESCAPE)
-        payload = {**data,
-                   "__metadata": {"type": self.type}
-                   }
-        self.sharepoint.session.patch(self.uri, json=payload)
+        self.patch(data)
+        self.sharepoint.invalidate(self.uri.rsplit("/", 1)[0])
+        if self._parent_list is not None:
+            self._parent_list.invalidate_fields()
+
+
+class FieldSchema:
+    """Indices de los campos de una lista por static name, internal name y title"""
+
+    def __init__(self, fields: list[ListField]):
+        self.fields = fields
+        self.by_static_name = {field.static_name: field for field in fields}
+        self.by_internal_name = {field.internal_name: field for field in fields}
+        self.by_title = {field.title: field for field in fields}
+        self.loaded_on = time.monotonic()
+
+    def is_expired(self, ttl: float) -> bool:
+        return time.monotonic() - self.loaded_on >= ttl
 
 
 class List(BaseSharePointModel):
@@ -287,15 +826,22 @@ class List(BaseSharePointModel):
     hidden: bool
     entity_type: str = Field(..., alias="ListItemEntityTypeFullName")
     base_template: int
+    odata_type: ClassVar[str] = "SP.List"
+    field_cache_ttl: ClassVar[float] = 300
+    _field_schema: Optional[FieldSchema] = PrivateAttr(default=None)
+
+    @classmethod
+    def derive_uri(cls, values: dict, sharepoint: SharePoint, source: str | None, collection: bool) -> str:
+        return sharepoint.api + f"/lists(guid'{values['Id']}')"
 
     @property
     def folder(self) -> Folder:
-        folder = self.get_deferred_item("RootFolder", Folder)
+        folder = self.get_deferred_item("RootFolder", Folder, cached=True)
         return folder
 
     @property
     def fields(self) -> list[ListField]:
-        items = self.get_deferred_items("Fields", ListField)
+        items = self.get_deferred_items("Fields", ListField, cached=True)
         return items
 
     @property
@@ -303,51 +849,294 @@ class List(BaseSharePointModel):
         items = self.get_deferred_items("Items", Item)
         return items
 
+    def iter_items(self, params: dict = None, page_size: int = None) -> Iterator[Item]:
+        return self.iter_deferred_items("Items", Item, params, page_size)
+
+    def export(self, path, format: str = None, params: dict = None, page_size: int = None) -> int:
+        """Exporta los items a parquet, arrow o csv pagina por pagina, tipando las columnas segun los campos"""
+        return export_list(self, path, format, params, page_size)
+
+    def iter_models(self, model: Type[GenericModel], params: dict = None,
+                    page_size: int = None) -> Iterator[GenericModel]:
+        """Lee los items como instancias de `model` (anidado, como en `insert_models`), sin pasar por `Item`"""
+        plan = model_plan(model)
+        params = {**(params or {}), "$select": plan.select}
+        for rows in self.iter_deferred_data("Items", params, page_size):
+            yield from plan.hydrate_page(rows)
+
+    def compact_reader(self) -> CompactReader:
+        return CompactReader(self.sharepoint, self.deferred_uri("Items"), Item)
+
+    def iter_rows(self, params: dict = None, page_size: int = None) -> Iterator[CompactRow]:
+        """Como `iter_items` pero sin validar: cada fila es una `CompactRow` y `row.to_item()` crea el `Item`"""
+        reader = self.compact_reader()
+        for rows in self.iter_deferred_data("Items", params, page_size):
+            yield from reader.page(rows)
+
+    @property
+    def current_change_token(self) -> str:
+        response = self.sharepoint.session.get(self.uri, params={"$select": "CurrentChangeToken"})
+        return self.sharepoint.response_data(response)["CurrentChangeToken"]["StringValue"]
+
+    def get_items_by_id(self, ids: Iterable[int], params: dict = None, chunk_size: int = 50) -> list[Item]:
+        params = {} if params is None else params
+        items = []
+        for chunk in chunked(ids, chunk_size):
+            filters = " or ".join(f"(ID eq {item_id})" for item_id in chunk)
+            items.extend(self.iter_items({**params, "$filter": filters}))
+        return items
+
+    def get_changes(self, token: str | None, params: dict = None) -> ChangeSet:
+        """Items agregados, actualizados y eliminados desde `token` usando GetChanges. Si no hay token o
+        SharePoint ya no lo reconoce (expirado), se hace una resincronizacion completa"""
+        if token is None:
+            return self._full_resync(params)
+        url = self.uri + "/GetChanges"
+        states: dict[int, str] = {}
+        try:
+            while True:
+                response = self.sharepoint.session.post(url, json=change_query(token))
+                results = page_results(self.sharepoint.response_data(response))
+                if not results:
+                    break
+                for change in results:
+                    item_id = change["ItemId"]
+                    previous = states.get(item_id)
+                    match change["ChangeType"]:
+                        case ChangeType.add | ChangeType.restore:
+                            states[item_id] = "added"
+                        case ChangeType.delete_object if previous == "added":
+                            del states[item_id]
+                        case ChangeType.delete_object:
+                            states[item_id] = "deleted"
+                        case _ if previous != "added":
+                            states[item_id] = "updated"
+                token = results[-1]["ChangeToken"]["StringValue"]
+        except SharePointError as e:
+            if not is_invalid_token_error(e):
+                raise
+            return self._full_resync(params)
+
+        changed_ids = [item_id for item_id, state in states.items() if state != "deleted"]
+        items = self.get_items_by_id(changed_ids, params)
+        return ChangeSet(token=token,
+                         added=[item for item in items if states[item.id] == "added"],
+                         updated=[item for item in items if states[item.id] == "updated"],
+                         deleted=[item_id for item_id, state in states.items() if state == "deleted"])
+
+    def _full_resync(self, params: dict = None) -> ChangeSet:
+        # El token se obtiene antes de leer para no perder cambios hechos durante la lectura
+        token = self.current_change_token
+        return ChangeSet(token=token, added=list(self.iter_items(params)), full_resync=True)
+
+    def sync(self, store) -> ChangeSet:
+        changes = self.get_changes(store.get(self.id))
+        store.set(self.id, changes.token)
+        return changes
+
+    @property
+    def field_schema(self) -> FieldSchema:
+        """Campos de la lista cacheados por `field_cache_ttl` segundos"""
+        schema = self._field_schema
+        if schema is None or schema.is_expired(self.field_cache_ttl):
+            fields = self.fields
+            for field in fields:
+                field._parent_list = self
+            schema = FieldSchema(fields)
+            self._field_schema = schema
+        return schema
+
+    def invalidate_fields(self) -> None:
+        self._field_schema = None
+        self.sharepoint.invalidate(self.deferred_uri("Fields"))
+
     def get_user_created_fields(self) -> list[ListField]:
-        items = self.fields
+        items = self.field_schema.fields
         items = [field for field in items if field.static_name not in AUTO_LIST_FIELDS]
         return items
 
-    def get_field_by_static_name(self, static_name):
-        fields = self.fields
-        fields = [field for field in fields if field.static_name == static_name]
-        if not fields:
-            raise KeyError(f"No field found with static_name: {static_name}")
-        return fields[0]
+    def get_field_by_static_name(self, static_name) -> ListField:
+        try:
+            return self.field_schema.by_static_name[static_name]
+        except KeyError:
+            raise KeyError(f"No field found with static_name: {static_name}") from None
+
+    def get_field_by_internal_name(self, internal_name) -> ListField:
+        try:
+            return self.field_schema.by_internal_name[internal_name]
+        except KeyError:
+            raise KeyError(f"No field found with internal_name: {internal_name}") from None
+
+    def get_field_by_title(self, title) -> ListField:
+        try:
+            return self.field_schema.by_title[title]
+        except KeyError:
+            raise KeyError(f"No field found with title: {title}") from None
 
     def create_field(self, payload):
         url = self.uri + "/fields"
         url = url + "/addfield" if payload.get("parameters") else url
         response = self.sharepoint.session.post(url, json=payload)
-        data = response.json()["d"]
+        data = self.sharepoint.response_data(response)
+        self.invalidate_fields()
         return data
 
+    def ensure_schema(self, model: Type[BaseModel], batch_size: int = 100) -> SchemaChanges:
+        """Crea o actualiza solo las columnas de `pydantic_to_sharepoint(model)` que difieren de las existentes
+        (por titulo, tipo y opciones), todo en requests $batch. Se puede llamar en cada despliegue"""
+        existing = self.field_schema.by_title
+        changes = SchemaChanges()
+        operations, actions = [], []
+        for column in pydantic_to_sharepoint(model):
+            payload = column.payload()
+            data = payload.get("parameters", payload)
+            field = existing.get(column.title)
+            if field is None:
+                url = self.uri + ("/fields/addfield" if "parameters" in payload else "/fields")
+                operations.append(BatchOperation("POST", url, payload))
+                actions.append((column.title, changes.created))
+                continue
+            if field.field_type_kind is not None and field.field_type_kind != data["FieldTypeKind"]:
+                changes.conflicts.append(column.title)
+                continue
+            choices = data.get("Choices", {}).get("results")
+            if choices is not None and field.choice_values != choices:
+                payload = {"__metadata": {"type": field.type or "SP.FieldChoice"},
+                           "Choices": {"__metadata": {"type": "Collection(Edm.String)"}, "results": choices}}
+                operations.append(BatchOperation("PATCH", field.uri, payload))
+                actions.append((column.title, changes.updated))
+            else:
+                changes.unchanged.append(column.title)
+
+        if operations:
+            results = self.sharepoint.batch(operations, batch_size)
+            self.invalidate_fields()
+            for (title, changed), result in zip(actions, results):
+                if result.ok:
+                    changed.append(title)
+                else:
+                    changes.errors[title] = result.error
+        return changes
+
     def create_item(self, data) -> Item:
         url = self.uri + "/items"
-        data = replace_key_mapping(data, COLUMN_ESCAPE)
+        data = COLUMN_CODEC.encode_keys(data)
         payload = {**data,
                    "__metadata": {"type": self.entity_type}}
         response = self.sharepoint.session.post(url, json=payload)
-        data = response.json()["d"]
-        item = Item(**data, sharepoint=self.sharepoint)
+        self.sharepoint.invalidate(self.uri)
+        data = self.sharepoint.response_data(response)
+        item = Item.from_data(data, self.sharepoint, source=url, collection=True)
         return item
 
+    def item_uri(self, item: "Item | int") -> str:
+        return item.uri if isinstance(item, Item) else self.uri + f"/items({item})"
+
+    def bulk_create(self, rows: Iterable[dict], batch_size: int = 100) -> list[BatchResult]:
+        return self._bulk_create((COLUMN_CODEC.encode_keys(row) for row in rows), batch_size)
+
+    def insert_models(self, instances: Iterable[BaseModel], batch_size: int = 100) -> list[BatchResult]:
+        """Crea un item por instancia en las columnas de `pydantic_to_sharepoint`. El plan de aplanado de cada
+        modelo se compila una vez y los payloads se generan a medida que se envian los batches"""
+        payloads = (model_plan(type(instance)).payload(instance) for instance in instances)
+        return self._bulk_create(payloads, batch_size)
+
+    def _bulk_create(self, payloads: Iterable[dict], batch_size: int) -> list[BatchResult]:
+        # Los payloads ya vienen con los nombres de columna escapados
+        operations = (BatchOperation("POST", self.uri + "/items", {**payload, "__metadata": {"type": self.entity_type}})
+                      for payload in payloads)
+        results = self.sharepoint.batch(operations, batch_size)
+        self.sharepoint.invalidate(self.uri)
+        for result in results:
+            if result.ok:
+                result.data = Item(**result.data, sharepoint=self.sharepoint)
+        return results
+
+    def bulk_update(self, updates: Iterable[tuple["Item | int", dict]], batch_size: int = 100) -> list[BatchResult]:
+        operations = (BatchOperation("PATCH", self.item_uri(item),
+                                     {**COLUMN_CODEC.encode_keys(data),
+                                      "__metadata": {"type": self.entity_type}})
+                      for item, data in updates)
+        results = self.sharepoint.batch(operations, batch_size)
+        self.sharepoint.invalidate(self.uri)
+        return results
+
+    def bulk_delete(self, items: Iterable["Item | int"], batch_size: int = 100) -> list[BatchResult]:
+        operations = (BatchOperation("DELETE", self.item_uri(item)) for item in items)
+        results = self.sharepoint.batch(operations, batch_size)
+        self.sharepoint.invalidate(self.uri)
+        return results
+
     def upload_file(self, file_name, content, data=None):
         file = self.folder.upload_file(file_name, content)
         if data is not None:
             file.list_item.update(data)
         return file
 
+    def upload_many(self, files: Iterable[tuple[str, Any, dict | None]], workers: int = UPLOAD_WORKERS,
+                    chunk_size: int = CHUNK_SIZE) -> list[UploadResult]:
+        """`Folder.upload_many` sobre la carpeta raiz, leida una sola vez"""
+        return self.folder.upload_many(files, workers, chunk_size, parent_list=self)
+
     def delete(self):
         self.sharepoint.session.delete(self.uri)
-
+        self.sharepoint.invalidate(self.uri)
+
+
+    def max_item_id(self) -> int:
+        rows = next(self.iter_deferred_data("Items", {"$select": "Id", "$orderby": "Id desc"}, page_size=1))
+        return rows[0]["Id"] if rows else 0
+
+    def iter_id_windows(self, params: dict = None, window: int = ID_WINDOW, workers: int = 1) -> Iterator[list[dict]]:
+        """Lee la lista por ventanas de ID (`ID gt N and ID le N + window`), que usan el indice de ID y evitan el
+        umbral de vistas aun con filtros sobre columnas no indexadas. Con `workers` > 1 se leen varias ventanas en
+        paralelo. Entrega el JSON crudo de cada ventana en orden de ID"""
+        params = {} if params is None else dict(params)
+        filters = params.pop("$filter", None)
+        params.pop("$orderby", None)
+
+        def fetch_window(start):
+            window_filter = f"(ID gt {start}) and (ID le {start + window})"
+            if filters:
+                window_filter += f" and ({filters})"
+            rows = []
+            for page in self.iter_deferred_data("Items", {**params, "$filter": window_filter}, page_size=window):
+                rows.extend(page)
+            return rows
+
+        starts = iter(range(0, self.max_item_id(), window))
+        if workers <= 1:
+            for start in starts:
+                yield fetch_window(start)
+            return
+        # Se mantienen a lo mas 2 * workers ventanas en vuelo para acotar la memoria
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque(executor.submit(fetch_window, start) for start in islice(starts, 2 * workers))
+            try:
+                while pending:
+                    rows = pending.popleft().result()
+                    start = next(starts, None)
+                    if start is not None:
+                        pending.append(executor.submit(fetch_window, start))
+                    yield rows
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def iter_items_by_id(self, params: dict = None, window: int = ID_WINDOW, workers: int = 1) -> Iterator[Item]:
+        url = self.deferred_uri("Items")
+        for rows in self.iter_id_windows(params, window, workers):
+            yield from (Item.from_data(row, self.sharepoint, source=url, collection=True) for row in rows)
+
+    def query(self, model: Type[GenericModel] = None) -> ItemQuery[GenericModel]:
+        return ItemQuery(self, model)
 
     def query_items(self, filters: list[str], select: list[str]) -> list[Item]:
         filters = [] if filters is None else filters
         select = [] if select is None else select
-        filters = [f"({filter_.replace('.', '_x002e_')})" for filter_ in filters]
+        filters = [f"({escape_filter(filter_)})" for filter_ in filters]
         filters = "and".join(filters)
-        select = [f"{field.replace('.', '_x002e_')}" for field in select]
+        select = [COLUMN_CODEC.encode(field) for field in select]
         select = ",".join(select)
 
         params = {"$filter": filters, "$select": select}
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 
-from .utils import to_camel, replace_key_mapping, COLUMN_ESCAPE
+from .utils import to_camel, COLUMN_CODEC
 
 
 class Field(BaseModel):
@@ -18,7 +18,7 @@ class Field(BaseModel):
 
     def data(self):
         data = self.model_dump(by_alias=True, exclude={"type"}, exclude_none=True)
-        data = replace_key_mapping(data, COLUMN_ESCAPE)
+        data = COLUMN_CODEC.encode_keys(data)
         return data
 
     def payload(self):
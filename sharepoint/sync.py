@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import requests
+
+from .session import SharePointError
+
+if TYPE_CHECKING:
+    from .sharepoint import Folder, File
+
+MANIFEST_NAME = ".sharepoint-sync.json"
+SYNC_WORKERS = 8
+FORMS_FOLDER = "Forms"
+PART_SUFFIX = ".part"  # Descargas en curso de `sync_to`
+
+
+def file_hash(path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as stream:
+        while chunk := stream.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SyncManifest:
+    """Estado de la ultima sincronizacion por ruta relativa: tamano, mtime y hash locales, y ETag/UniqueId remotos"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r") as file:
+                self.entries: dict[str, dict] = json.load(file)
+        except FileNotFoundError:
+            self.entries = {}
+
+    def get(self, name: str) -> dict | None:
+        return self.entries.get(name)
+
+    def set(self, name: str, local_path, remote: "File", content_hash: str = None):
+        stat = os.stat(local_path)
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": content_hash or file_hash(local_path),
+                 "etag": remote.etag, "unique_id": remote.unique_id}
+        with self._lock:
+            self.entries[name] = entry
+
+    def remove(self, name: str):
+        with self._lock:
+            self.entries.pop(name, None)
+
+    def save(self):
+        with self._lock:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as file:
+                json.dump(self.entries, file)
+            os.replace(temp_path, self.path)
+
+    def local_unchanged(self, name: str, local_path) -> bool:
+        """El archivo local no cambio desde la ultima sincronizacion. Solo se calcula el hash si cambio el mtime"""
+        entry = self.entries.get(name)
+        if entry is None:
+            return False
+        stat = os.stat(local_path)
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns == entry["mtime"]:
+            return True
+        if file_hash(local_path) != entry["hash"]:
+            return False
+        with self._lock:
+            entry["mtime"] = stat.st_mtime_ns
+        return True
+
+
+@dataclass
+class SyncReport:
+    """Rutas relativas afectadas por una sincronizacion. Con `dry_run` son las acciones que se habrian hecho"""
+    uploaded: list[str] = field(default_factory=list)
+    downloaded: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    errors: dict[str, str] = field(default_factory=dict)
+    dry_run: bool = False
+
+
+def local_files(local_dir) -> dict[str, str]:
+    """Ruta relativa con `/` -> ruta local, sin el manifest"""
+    files = {}
+    for root, _, names in os.walk(local_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, local_dir).replace(os.sep, "/")
+            if relative != MANIFEST_NAME and not relative.endswith((f"{MANIFEST_NAME}.tmp", PART_SUFFIX)):
+                files[relative] = path
+    return files
+
+
+def remote_tree(folder: "Folder", workers: int) -> tuple[dict[str, "Folder"], dict[str, "File"]]:
+    """Carpetas y archivos bajo `folder`, por ruta relativa. La carpeta raiz queda como ``"""
+    prefix = folder.server_relative_url.rstrip("/") + "/"
+    folders, files = {"": folder}, {}
+    for current, subfolders, current_files in folder.walk(max_workers=workers):
+        if current is folder and any(sub.name == FORMS_FOLDER for sub in subfolders) and folder.is_list_root:
+            # No descender en la carpeta de sistema con las vistas de la biblioteca (AllItems.aspx, etc.)
+            subfolders[:] = [sub for sub in subfolders if sub.name != FORMS_FOLDER]
+        for subfolder in subfolders:
+            folders[subfolder.server_relative_url.removeprefix(prefix)] = subfolder
+        for file in current_files:
+            files[file.server_relative_url.removeprefix(prefix)] = file
+    return folders, files
+
+
+def run_parallel(report: SyncReport, done: list[str], names: Iterable[str], function: Callable[[str], None],
+                 workers: int):
+    """Aplica `function` a cada ruta en paralelo. Los errores quedan en `report.errors` sin detener al resto"""
+    def run(name):
+        try:
+            function(name)
+            return name, None
+        except (requests.RequestException, SharePointError, OSError) as e:
+            return name, str(e)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for name, error in executor.map(run, sorted(names)):
+            if error is None:
+                done.append(name)
+            else:
+                report.errors[name] = error
+
+
+def sync_from(folder: "Folder", local_dir, delete: bool = False, dry_run: bool = False,
+              workers: int = SYNC_WORKERS, manifest_path=None) -> SyncReport:
+    """Sube a `folder` los archivos de `local_dir` nuevos o modificados desde la ultima sincronizacion, o cuyo
+    archivo remoto cambio. Con `delete` elimina los remotos que ya no existen localmente"""
+    manifest = SyncManifest(manifest_path or os.path.join(local_dir, MANIFEST_NAME))
+    report = SyncReport(dry_run=dry_run)
+    local = local_files(local_dir)
+    folders, remote = remote_tree(folder, workers)
+
+    uploads, deletes = {}, {}
+    for name, path in local.items():
+        remote_file = remote.get(name)
+        entry = manifest.get(name)
+        if remote_file is not None and entry is not None and entry["etag"] == remote_file.etag \
+                and manifest.local_unchanged(name, path):
+            report.unchanged.append(name)
+            continue
+        uploads[name] = path
+    if delete:
+        deletes = {name: remote_file for name, remote_file in remote.items() if name not in local}
+
+    if dry_run:
+        report.uploaded, report.deleted = sorted(uploads), sorted(deletes)
+        return report
+
+    # Crear primero las carpetas que faltan, de la mas externa a la mas interna
+    for name in sorted({name.rsplit("/", 1)[0] for name in uploads if "/" in name}):
+        parts = name.split("/")
+        for depth in range(1, len(parts) + 1):
+            relative = "/".join(parts[:depth])
+            if relative not in folders:
+                parent = folders["/".join(parts[:depth - 1])]
+                folders[relative] = parent.create_folder(parts[depth - 1])
+
+    def upload(name):
+        path = uploads[name]
+        parent, _, file_name = name.rpartition("/")
+        content_hash = file_hash(path)
+        file = folders[parent].upload_file(file_name, Path(path))
+        manifest.set(name, path, file, content_hash)
+
+    def remove(name):
+        deletes[name].delete()
+        manifest.remove(name)
+
+    run_parallel(report, report.uploaded, uploads, upload, workers)
+    run_parallel(report, report.deleted, deletes, remove, workers)
+    manifest.save()
+    return report
+
+
+def sync_to(folder: "Folder", local_dir, delete: bool = False, dry_run: bool = False,
+            workers: int = SYNC_WORKERS, manifest_path=None) -> SyncReport:
+    """Descarga de `folder` a `local_dir` los archivos cuyo ETag cambio desde la ultima sincronizacion o que no
+    existen localmente. Con `delete` elimina los archivos locales que ya no existen en SharePoint"""
+    manifest = SyncManifest(manifest_path or os.path.join(local_dir, MANIFEST_NAME))
+    report = SyncReport(dry_run=dry_run)
+    local = local_files(local_dir) if os.path.isdir(local_dir) else {}
+    _, remote = remote_tree(folder, workers)
+
+    downloads, deletes = {}, {}
+    for name, remote_file in remote.items():
+        entry = manifest.get(name)
+        path = local.get(name)
+        if path is not None and entry is not None and entry["etag"] == remote_file.etag \
+                and manifest.local_unchanged(name, path):
+            report.unchanged.append(name)
+            continue
+        downloads[name] = remote_file
+    if delete:
+        deletes = {name: path for name, path in local.items() if name not in remote}
+
+    if dry_run:
+        report.downloaded, report.deleted = sorted(downloads), sorted(deletes)
+        return report
+    os.makedirs(local_dir, exist_ok=True)
+
+    def download(name):
+        path = os.path.join(local_dir, *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Se descarga a un temporal para no dejar archivos a medias si falla
+        temp_path = f"{path}{PART_SUFFIX}"
+        try:
+            downloads[name].download_to(temp_path, resume=False)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        manifest.set(name, path, downloads[name])
+
+    def remove(name):
+        os.remove(deletes[name])
+        manifest.remove(name)
+
+    run_parallel(report, report.downloaded, downloads, download, workers)
+    run_parallel(report, report.deleted, deletes, remove, workers)
+    manifest.save()
+    return report
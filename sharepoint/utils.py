@@ -1,4 +1,17 @@
+import io
+import json
+import os
 import re
+import tempfile
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from itertools import islice
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+    import msvcrt
 
 
 def replace_string_map(word: str, replace_map: dict, reverse=False):
@@ -19,6 +32,104 @@ def replace_key_mapping(dictionary: dict, replace_map: dict, reverse=False):
     return result
 
 
+def chunked(iterable, size: int):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+@contextmanager
+def open_source(source):
+    """Abre `source` (ruta `os.PathLike`, str, bytes o file-like binario) como stream seekable. Un `str` es el
+    contenido a subir (en UTF-8), no una ruta"""
+    if isinstance(source, os.PathLike):
+        with open(source, "rb") as stream:
+            yield stream
+    elif isinstance(source, str):
+        yield io.BytesIO(source.encode("utf-8"))
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+    else:
+        with nullcontext(source) as stream:
+            yield stream
+
+
+def source_size(stream) -> int:
+    position = stream.tell()
+    size = stream.seek(0, io.SEEK_END)
+    stream.seek(position)
+    return size - position
+
+
+@contextmanager
+def file_lock(path):
+    """Lock exclusivo entre procesos (y threads) sobre el archivo `path`, que se crea si no existe"""
+    with open(path, "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:  # pragma: no cover
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:  # pragma: no cover
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def write_atomic(path, text: str, mode: int = 0o644):
+    """Escribe `text` en un temporal con nombre unico en el mismo directorio y lo reemplaza sobre `path`, asi quien
+    lea nunca ve un archivo a medias. El temporal se crea con permisos 0600 y queda con `mode`"""
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as file:
+            file.write(text)
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+class JsonFileStore:
+    """Valores de texto por llave en un archivo JSON que pueden compartir varios procesos: cada escritura lee,
+    modifica y reemplaza el archivo bajo un lock de archivo (`<path>.lock`)"""
+    mode = 0o644
+
+    def __init__(self, path):
+        self.path = path
+
+    def _read(self) -> dict[str, str]:
+        try:
+            with open(self.path, "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def get(self, key: str) -> str | None:
+        return self._read().get(key)
+
+    def set(self, key: str, value: str) -> None:
+        with file_lock(f"{self.path}.lock"):
+            values = self._read()
+            values[key] = value
+            write_atomic(self.path, json.dumps(values), self.mode)
+
+
+def page_results(data: dict) -> list[dict]:
+    """Resultados de una coleccion, en formato verbose (`results`) o light (`value`)"""
+    return data["results"] if "results" in data else data["value"]
+
+
+def page_next(data: dict) -> str | None:
+    return data.get("__next") or data.get("odata.nextLink")
+
+
 def to_camel(string: str) -> str:
     return ''.join(word.capitalize() for word in string.split('_'))
 
@@ -38,6 +149,36 @@ COLUMN_ESCAPE = {'~': '_x007e_', '!': '_x0021_', '@': '_x0040_',
                  '\\': '_x005c_', '<': '_x003c_', '>': '_x003e_',
                  '?': '_x003f_', ',': '_x002c_', '.': '_x002e_',
                  '/': '_x002f_', '`': '_x0060_', " ": '_x0020_'}
+
+
+class ColumnCodec:
+    """Escapa/desescapa nombres de columnas en una sola pasada (tabla de traduccion / regex precompilada),
+    memorizando el resultado por nombre"""
+
+    def __init__(self, escape_map: dict[str, str], cache_size: int = 8192):
+        self.escape_map = escape_map
+        self.unescape_map = {value: key for key, value in escape_map.items()}
+        self._table = str.maketrans(escape_map)
+        self._pattern = re.compile("|".join(re.escape(value) for value in self.unescape_map))
+        self.encode = lru_cache(maxsize=cache_size)(self._encode)
+        self.decode = lru_cache(maxsize=cache_size)(self._decode)
+
+    def _encode(self, name: str) -> str:
+        return name.translate(self._table)
+
+    def _decode(self, name: str) -> str:
+        return self._pattern.sub(lambda match: self.unescape_map[match.group()], name)
+
+    def encode_keys(self, dictionary: dict) -> dict:
+        encode = self.encode
+        return {encode(key): value for key, value in dictionary.items()}
+
+    def decode_keys(self, dictionary: dict) -> dict:
+        decode = self.decode
+        return {decode(key): value for key, value in dictionary.items()}
+
+
+COLUMN_CODEC = ColumnCodec(COLUMN_ESCAPE)
 AUTO_LIST_FIELDS = {'AccessPolicy', 'AppAuthor', 'AppEditor', 'Attachments', 'BaseName', 'ComplianceAssetId',
                     'ContentType', 'ContentTypeId', 'ContentVersion', 'Created_x0020_Date', 'DocIcon', 'Edit', 'Editor',
                     'EncodedAbsUrl', 'FSObjType', 'FileDirRef', 'FileLeafRef', 'FileRef', 'File_x0020_Type',
@@ -69,4 +210,6 @@ AUTO_ITEM_PROPERTIES = {"AttachmentFiles", "AuthorId", "CheckoutUserId", "Compli
                         "Folder", "GUID", "GetDlpPolicyTip", "ID", "Id", "LikedByInformation", "Modified",
                         "OData__CopySource", "OData__UIVersionString", "ParentList", "Properties", "RoleAssignments",
                         "ServerRedirectedEmbedUri", "ServerRedirectedEmbedUrl", "Title", "Versions", "__metadata",
-                        "Attachments"}
\ No newline at end of file
+                        "Attachments", "odata.type", "odata.id", "odata.etag", "odata.editLink"}
+
+METADATA_KEYS = {"__metadata", "odata.type", "odata.id", "odata.etag", "odata.editLink"}
@@ -7,6 +7,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import BaseModel, Field
 
 from sharepoint import SharePoint, SharepointSession, sp_fields
+from tests.mock_server import MockServer
 
 """
 PyTest permite crear "fixtures" para obejetos/ parametros resuables en los distintos tests.
@@ -107,3 +108,14 @@ def pydantic_parsed_data(pydantic_model):
     ]
     parsed = [pydantic_model(**entry) for entry in data]
     return parsed
+
+
+@pytest.fixture(scope='session')
+def mock_server():
+    with MockServer() as server:
+        yield server
+
+
+@pytest.fixture(scope='function')
+def mock_sharepoint(mock_server):
+    return mock_server.client()
@@ -0,0 +1,635 @@
+"""
+Servidor HTTP local que imita los endpoints REST de SharePoint que usa la libreria (token, listas, campos, items con
+paginacion `__next`, carpetas, archivos, subidas por partes, GetChanges y $batch). Permite correr tests y benchmarks
+sin un tenant real, con latencia y throttling configurables.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, unquote, parse_qsl, urlencode
+
+from sharepoint import SharePoint, SharepointSession
+from sharepoint.utils import COLUMN_CODEC
+
+FIELD_TYPES = {1: "Integer", 2: "Text", 3: "Note", 4: "DateTime", 6: "Choice", 7: "Lookup", 8: "Boolean",
+               9: "Number", 15: "MultiChoice", 17: "Calculated"}
+# FieldTypeKind -> tipos aceptados al escribir un item, como rechaza SharePoint un valor del tipo equivocado
+FIELD_VALUE_TYPES = {1: (int,), 2: (str,), 3: (str,), 6: (str,), 8: (bool,), 9: (int, float), 15: (dict,)}
+DEFAULT_FIELDS = [("Title", 2), ("ID", 1), ("Created", 4), ("Modified", 4)]
+PAGE_SIZE = 100
+
+
+class MockError(Exception):
+
+    def __init__(self, status: int, message: str):
+        self.status = status
+        self.message = message
+        super().__init__(message)
+
+
+@dataclass
+class MockList:
+    id: str
+    title: str
+    base_template: int
+    root_folder: str
+    items: dict[int, dict] = field(default_factory=dict)
+    fields: list[dict] = field(default_factory=list)
+    next_id: int = 1
+
+    @property
+    def entity_type(self):
+        return f"SP.Data.{COLUMN_CODEC.encode(self.title)}ListItem"
+
+
+@dataclass
+class MockFile:
+    path: str
+    content: bytearray
+    unique_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    version: int = 1
+    item_id: int | None = None
+    upload_id: str | None = None
+
+    @property
+    def etag(self):
+        return f"\"{{{self.unique_id.upper()}}},{self.version}\""
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# $filter minimo: comparaciones unidas con and/or y parentesis
+# --------------------------------------------------------------------------------------------------------------------
+
+FILTER_TOKENS = re.compile(r"\s*(\(|\)|'(?:[^']|'')*'|datetime'[^']*'|[^\s()]+)")
+OPERATORS = {"eq": lambda a, b: a == b, "ne": lambda a, b: a != b, "gt": lambda a, b: a is not None and a > b,
+             "ge": lambda a, b: a is not None and a >= b, "lt": lambda a, b: a is not None and a < b,
+             "le": lambda a, b: a is not None and a <= b}
+
+
+def parse_literal(token: str):
+    if token.startswith("'"):
+        return token[1:-1].replace("''", "'")
+    if token.startswith("datetime'"):
+        return token[9:-1]
+    if token in ("true", "false"):
+        return token == "true"
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def compile_filter(expression: str):
+    tokens = FILTER_TOKENS.findall(expression)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        left = parse_and()
+        while peek() == "or":
+            take()
+            right = parse_and()
+            left = (lambda l, r: lambda row: l(row) or r(row))(left, right)
+        return left
+
+    def parse_and():
+        left = parse_term()
+        while peek() == "and":
+            take()
+            right = parse_term()
+            left = (lambda l, r: lambda row: l(row) and r(row))(left, right)
+        return left
+
+    def parse_term():
+        if peek() == "(":
+            take()
+            result = parse_or()
+            take()
+            return result
+        name, operator, value = take(), take(), parse_literal(take())
+        compare = OPERATORS[operator]
+        return lambda row: compare(row.get(name), value)
+
+    return parse_or()
+
+
+class MockSharePoint:
+    """Estado en memoria y despacho de requests REST"""
+
+    def __init__(self, site: str = "mock", latency: float = 0.0, throttle_every: int | None = None,
+                 retry_after: float = 0.01, page_size: int = PAGE_SIZE, file_etags: bool = True):
+        self.site = site
+        self.file_etags = file_etags
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.page_size = page_size
+        self.base_url = ""
+        self.lists: dict[str, MockList] = {}
+        self.folders: set[str] = set()
+        self.files: dict[str, MockFile] = {}
+        self.changes: list[tuple[int, int, str, int]] = []  # (token, tipo, id lista, id item)
+        self.request_count = 0
+        self._lock = threading.RLock()
+        self.create_list("Documents", base_template=101, root_folder="Shared Documents")
+
+    # ---- helpers de estado --------------------------------------------------------------------------------------
+
+    @property
+    def site_path(self):
+        return f"/sites/{self.site}"
+
+    @property
+    def api(self):
+        return f"{self.base_url}{self.site_path}/_api/web"
+
+    def absolute_path(self, path: str) -> str:
+        path = unquote(path).rstrip("/")
+        return path if path.startswith("/") else f"{self.site_path}/{path}"
+
+    def create_list(self, title: str, base_template: int = 100, root_folder: str = None) -> MockList:
+        list_id = str(uuid.uuid4())
+        root_folder = self.absolute_path(root_folder or f"Lists/{title}")
+        mock_list = MockList(id=list_id, title=title, base_template=base_template, root_folder=root_folder)
+        for name, kind in DEFAULT_FIELDS:
+            mock_list.fields.append(self.field_data(name, kind))
+        self.lists[list_id] = mock_list
+        self.folders.add(root_folder)
+        if base_template == 101:
+            # Carpeta de sistema con las vistas de la biblioteca; sus paginas no son items
+            self.folders.add(f"{root_folder}/Forms")
+            for page in ("AllItems.aspx", "EditForm.aspx"):
+                self.files[f"{root_folder}/Forms/{page}"] = MockFile(path=f"{root_folder}/Forms/{page}",
+                                                                     content=bytearray(b"<html></html>"))
+        return mock_list
+
+    def add_items(self, mock_list: MockList, rows: list[dict]) -> list[dict]:
+        """Inserta filas directamente (sin HTTP), util para preparar benchmarks"""
+        with self._lock:
+            return [self.insert_item(mock_list, COLUMN_CODEC.encode_keys(row)) for row in rows]
+
+    def insert_item(self, mock_list: MockList, data: dict) -> dict:
+        item_id = mock_list.next_id
+        mock_list.next_id += 1
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        row = {"Id": item_id, "ID": item_id, "Title": None, "Created": now, "Modified": now,
+               **{key: value for key, value in data.items() if key != "__metadata"}}
+        mock_list.items[item_id] = row
+        self.log_change(1, mock_list, item_id)
+        return row
+
+    @staticmethod
+    def check_values(mock_list: MockList, data: dict):
+        kinds = {field["InternalName"]: field["FieldTypeKind"] for field in mock_list.fields}
+        for key, value in data.items():
+            types = FIELD_VALUE_TYPES.get(kinds.get(key))
+            if value is not None and types is not None and not isinstance(value, types):
+                raise MockError(400, f"Cannot convert a primitive value to the expected type for field {key}")
+
+    def log_change(self, change_type: int, mock_list: MockList, item_id: int):
+        self.changes.append((len(self.changes) + 1, change_type, mock_list.id, item_id))
+
+    def field_data(self, title: str, kind: int, **extra) -> dict:
+        name = COLUMN_CODEC.encode(title)
+        return {"Id": str(uuid.uuid4()), "Title": title, "StaticName": name, "InternalName": name,
+                "Description": extra.get("Description", ""), "Required": extra.get("Required", False),
+                "Hidden": False, "DefaultValue": None, "CustomFormatter": None,
+                "TypeAsString": FIELD_TYPES.get(kind, "Text"), "FieldTypeKind": kind,
+                **({"Choices": extra["Choices"]} if "Choices" in extra else {})}
+
+    def find_list(self, title: str = None, list_id: str = None, root_folder: str = None) -> MockList:
+        for mock_list in self.lists.values():
+            if (title is not None and mock_list.title.lower() == title.lower()) or mock_list.id == list_id \
+                    or (root_folder is not None and mock_list.root_folder.lower() == root_folder.lower()):
+                return mock_list
+        raise MockError(404, f"List does not exist: {title or list_id or root_folder}")
+
+    def library_for(self, path: str) -> MockList | None:
+        for mock_list in self.lists.values():
+            if path == mock_list.root_folder or path.startswith(mock_list.root_folder + "/"):
+                return mock_list
+        return None
+
+    # ---- serializacion -----------------------------------------------------------------------------------------
+
+    @staticmethod
+    def deferred(uri: str, *names: str) -> dict:
+        return {name: {"__deferred": {"uri": f"{uri}/{name}"}} for name in names}
+
+    def list_json(self, mock_list: MockList) -> dict:
+        uri = f"{self.api}/lists(guid'{mock_list.id}')"
+        return {"__metadata": {"uri": uri, "type": "SP.List"},
+                **self.deferred(uri, "Items", "Fields", "RootFolder"),
+                "Id": mock_list.id, "Title": mock_list.title, "ItemCount": len(mock_list.items), "Hidden": False,
+                "ListItemEntityTypeFullName": mock_list.entity_type, "BaseTemplate": mock_list.base_template,
+                "CurrentChangeToken": {"StringValue": str(len(self.changes))}}
+
+    def item_json(self, mock_list: MockList, row: dict) -> dict:
+        uri = f"{self.api}/lists(guid'{mock_list.id}')/Items({row['Id']})"
+        data = {"__metadata": {"uri": uri, "type": mock_list.entity_type}, **row}
+        if mock_list.base_template == 101:
+            data.update(self.deferred(uri, "File"))
+        return data
+
+    def field_json(self, mock_list: MockList, data: dict) -> dict:
+        uri = f"{self.api}/lists(guid'{mock_list.id}')/Fields(guid'{data['Id']}')"
+        return {"__metadata": {"uri": uri, "type": f"SP.Field{data['TypeAsString']}"}, **data}
+
+    def folder_json(self, path: str) -> dict:
+        uri = f"{self.api}/GetFolderByServerRelativeUrl('{path}')"
+        children = [child for child in self.folders | set(self.files) if child.rsplit("/", 1)[0] == path]
+        return {"__metadata": {"uri": uri, "type": "SP.Folder"},
+                **self.deferred(uri, "Files", "Folders", "ListItemAllFields"),
+                "Name": path.rsplit("/", 1)[-1], "TimeCreated": "2024-01-01T00:00:00Z",
+                "ItemCount": len(children), "ServerRelativeUrl": path}
+
+    def file_json(self, mock_file: MockFile) -> dict:
+        uri = f"{self.api}/GetFileByServerRelativeUrl('{mock_file.path}')"
+        return {"__metadata": {"uri": uri, "type": "SP.File"},
+                **self.deferred(uri, "ListItemAllFields"),
+                "Name": mock_file.path.rsplit("/", 1)[-1], "TimeCreated": "2024-01-01T00:00:00Z",
+                "TimeLastModified": "2024-01-01T00:00:00Z", "ServerRelativeUrl": mock_file.path,
+                "Length": str(len(mock_file.content)), "UniqueId": mock_file.unique_id,
+                **({"ETag": mock_file.etag} if self.file_etags else {}), "UIVersionLabel": f"{mock_file.version}.0"}
+
+    def collection(self, url: str, query: dict, rows: list[dict], paged: bool = False) -> dict:
+        """Solo las colecciones de items se paginan con `__next`; en las demas `$top` recorta el resultado"""
+        if "$filter" in query:
+            predicate = compile_filter(query["$filter"])
+            rows = [row for row in rows if predicate(row)]
+        if "$orderby" in query:
+            for clause in reversed(query["$orderby"].split(",")):
+                name, _, direction = clause.strip().partition(" ")
+                rows.sort(key=lambda row: (row.get(name) is None, row.get(name)), reverse=direction == "desc")
+        skip = int(query.get("$skiptoken", 0))
+        top = int(query.get("$top", self.page_size if paged else len(rows)))
+        page = rows[skip:skip + top]
+        if "$select" in query:
+            select = {name.strip() for name in query["$select"].split(",")} | {"__metadata"}
+            if "*" not in select:
+                page = [{key: value for key, value in row.items() if key in select} for row in page]
+        data = {"results": page}
+        if paged and skip + top < len(rows):
+            data["__next"] = f"{url}?{urlencode({**query, '$skiptoken': skip + top})}"
+        return data
+
+    # ---- despacho ---------------------------------------------------------------------------------------------
+
+    def handle(self, method: str, url: str, headers: dict, body: bytes):
+        """Retorna (status, headers, cuerpo) para un request"""
+        parts = urlsplit(url)
+        path = unquote(parts.path)
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        try:
+            with self._lock:
+                if re.match(r"^/[^/]+/tokens/oAuth/2$", path):
+                    return 200, {}, {"token_type": "Bearer", "expires_in": "3599", "access_token": "mock-token"}
+                if path == f"{self.site_path}/_api/$batch":
+                    return self.batch(headers, body)
+                prefix = f"{self.site_path}/_api/web"
+                if not path.lower().startswith(prefix.lower()):
+                    raise MockError(404, f"Unknown endpoint {path}")
+                url = f"{self.base_url}{parts.path}"
+                status, response_headers, data = self.route(method, path[len(prefix):], url, query, body, headers)
+                data = self.odata_format(data, headers.get("accept", ""))
+                if method == "GET" and status == 200 and not isinstance(data, bytes):
+                    return self.conditional(headers, response_headers, data)
+                return status, response_headers, data
+        except MockError as e:
+            return e.status, {}, {"error": {"code": str(e.status), "message": {"lang": "en-US", "value": e.message}}}
+
+    @classmethod
+    def odata_format(cls, data, accept: str):
+        """Convierte la respuesta verbose (`{"d": ...}`) al formato pedido en Accept: minimalmetadata trae
+        `odata.*` con el editLink relativo a _api y nometadata solo los valores; ninguno trae links diferidos"""
+        match = re.search(r"odata=(\w+)", accept)
+        mode = match.group(1) if match else "verbose"
+        if mode == "verbose" or not isinstance(data, dict) or "d" not in data:
+            return data
+        data = data["d"]
+        if isinstance(data.get("results"), list) and "__metadata" not in data:
+            result = {"value": [cls.light_entity(row, mode) for row in data["results"]]}
+            if "__next" in data:
+                result["odata.nextLink"] = data["__next"]
+            return result
+        return cls.light_entity(data, mode)
+
+    @staticmethod
+    def light_entity(data: dict, mode: str) -> dict:
+        entity = {}
+        metadata = data.get("__metadata")
+        if metadata is not None and "uri" in metadata and mode == "minimalmetadata":
+            entity.update({"odata.type": metadata["type"], "odata.id": metadata["uri"],
+                           "odata.editLink": metadata["uri"].split("/_api/", 1)[1]})
+        for key, value in data.items():
+            if key == "__metadata" or (isinstance(value, dict) and "__deferred" in value):
+                continue
+            if isinstance(value, dict) and "results" in value:
+                value = value["results"]
+            entity[key] = value
+        return entity
+
+    @staticmethod
+    def conditional(headers: dict, response_headers: dict, data):
+        """ETag sobre el JSON de la respuesta y 304 si coincide con If-None-Match"""
+        etag = response_headers.get("ETag") or f"\"{hashlib.sha1(json.dumps(data).encode('utf-8')).hexdigest()}\""
+        response_headers = {**response_headers, "ETag": etag}
+        if headers.get("if-none-match") == etag:
+            return 304, response_headers, b""
+        return 200, response_headers, data
+
+    def route(self, method: str, path: str, url: str, query: dict, body: bytes, headers: dict):
+        try:
+            payload = json.loads(body) if body else None
+        except (ValueError, UnicodeDecodeError):
+            payload = None  # Contenido binario de archivos
+        if match := re.match(r"^/lists/GetByTitle\('(.*?)'\)(/.*)?$", path, re.IGNORECASE):
+            return self.route_list(method, self.find_list(title=match.group(1)), match.group(2) or "", url,
+                                   query, payload)
+        if match := re.match(r"^/lists\(guid'([^']+)'\)(/.*)?$", path, re.IGNORECASE):
+            return self.route_list(method, self.find_list(list_id=match.group(1)), match.group(2) or "", url,
+                                   query, payload)
+        if match := re.match(r"^/GetList\('(.*?)'\)(/.*)?$", path, re.IGNORECASE):
+            mock_list = self.find_list(root_folder=self.absolute_path(match.group(1)))
+            return self.route_list(method, mock_list, match.group(2) or "", url, query, payload)
+        if re.match(r"^/lists/?$", path, re.IGNORECASE):
+            if method == "POST":
+                mock_list = self.create_list(payload["Title"], payload.get("BaseTemplate", 100))
+                return 201, {}, {"d": self.list_json(mock_list)}
+            lists = [self.list_json(mock_list) for mock_list in self.lists.values()]
+            return 200, {}, {"d": {"results": lists}}
+        if match := re.match(r"^/GetFolderByServerRelativeUrl\('(.*?)'\)(/.*)?$", path, re.IGNORECASE):
+            return self.route_folder(method, self.absolute_path(match.group(1)), match.group(2) or "", url,
+                                     query, body)
+        if match := re.match(r"^/GetFileByServerRelativeUrl\('(.*?)'\)(/.*)?$", path, re.IGNORECASE):
+            return self.route_file(method, self.absolute_path(match.group(1)), match.group(2) or "", headers, body)
+        if re.match(r"^/folders/?$", path, re.IGNORECASE) and method == "POST":
+            folder = self.absolute_path(payload["ServerRelativeUrl"])
+            self.folders.add(folder)
+            return 201, {}, {"d": self.folder_json(folder)}
+        raise MockError(404, f"Unknown endpoint {path}")
+
+    def route_list(self, method: str, mock_list: MockList, rest: str, url: str, query: dict, payload: dict | None):
+        lower = rest.lower()
+        if lower == "":
+            if method == "DELETE":
+                del self.lists[mock_list.id]
+                return 200, {}, None
+            return 200, {}, {"d": self.list_json(mock_list)}
+        if lower == "/items":
+            if method == "POST":
+                self.check_values(mock_list, payload)
+                row = self.insert_item(mock_list, payload)
+                return 201, {}, {"d": self.item_json(mock_list, row)}
+            rows = [self.item_json(mock_list, row) for row in mock_list.items.values()]
+            return 200, {}, {"d": self.collection(url, query, rows, paged=True)}
+        if match := re.match(r"^/items\((\d+)\)(/.*)?$", lower):
+            item_id = int(match.group(1))
+            if item_id not in mock_list.items:
+                raise MockError(404, f"Item does not exist: {item_id}")
+            if match.group(2) == "/file":
+                return self.route_file("GET", mock_list.items[item_id]["FileRef"], "", {}, b"")
+            if method in ("PATCH", "MERGE", "POST"):
+                self.check_values(mock_list, payload)
+                mock_list.items[item_id].update({key: value for key, value in payload.items()
+                                                 if key != "__metadata"})
+                self.log_change(2, mock_list, item_id)
+                return 204, {}, None
+            if method == "DELETE":
+                del mock_list.items[item_id]
+                self.log_change(3, mock_list, item_id)
+                return 200, {}, None
+            return 200, {}, {"d": self.item_json(mock_list, mock_list.items[item_id])}
+        if lower == "/fields":
+            if method == "POST":
+                return self.add_field(mock_list, payload)
+            rows = [self.field_json(mock_list, data) for data in mock_list.fields]
+            return 200, {}, {"d": self.collection(url, query, rows)}
+        if lower == "/fields/addfield":
+            return self.add_field(mock_list, payload["parameters"])
+        if match := re.match(r"^/fields\(guid'([^']+)'\)$", lower):
+            data = next(data for data in mock_list.fields if data["Id"] == match.group(1))
+            if method in ("PATCH", "MERGE", "POST"):
+                data.update({key: value for key, value in payload.items() if key != "__metadata"})
+                return 204, {}, None
+            return 200, {}, {"d": self.field_json(mock_list, data)}
+        if lower.startswith("/rootfolder"):
+            return self.route_folder(method, mock_list.root_folder, rest[len("/RootFolder"):], url, query, b"")
+        if lower == "/getchanges":
+            return self.get_changes(mock_list, payload)
+        raise MockError(404, f"Unknown list endpoint {rest}")
+
+    def add_field(self, mock_list: MockList, payload: dict):
+        if any(data["Title"] == payload["Title"] for data in mock_list.fields):
+            raise MockError(400, f"A duplicate field name \"{payload['Title']}\" was found.")
+        data = self.field_data(payload["Title"], payload.get("FieldTypeKind", 2), **payload)
+        mock_list.fields.append(data)
+        return 201, {}, {"d": self.field_json(mock_list, data)}
+
+    def get_changes(self, mock_list: MockList, payload: dict):
+        start = payload["query"].get("ChangeTokenStart", {}).get("StringValue", "0")
+        try:
+            start = int(start)
+        except ValueError:
+            raise MockError(400, "The change token is invalid.")
+        changes = [{"ChangeType": change_type, "ItemId": item_id, "ChangeToken": {"StringValue": str(token)}}
+                   for token, change_type, list_id, item_id in self.changes
+                   if token > start and list_id == mock_list.id][:1000]
+        return 200, {}, {"d": {"results": changes}}
+
+    def route_folder(self, method: str, path: str, rest: str, url: str, query: dict, body: bytes):
+        if path not in self.folders:
+            raise MockError(404, f"File Not Found: {path}")
+        lower = rest.lower()
+        if lower == "":
+            return 200, {}, {"d": self.folder_json(path)}
+        if lower == "/folders":
+            rows = [self.folder_json(folder) for folder in sorted(self.folders)
+                    if folder.rsplit("/", 1)[0] == path]
+            return 200, {}, {"d": self.collection(url, query, rows)}
+        if lower == "/files":
+            rows = [self.file_json(mock_file) for name, mock_file in sorted(self.files.items())
+                    if name.rsplit("/", 1)[0] == path]
+            return 200, {}, {"d": self.collection(url, query, rows)}
+        if match := re.match(r"^/files/add\(url='(.*?)',overwrite=true\)$", rest, re.IGNORECASE):
+            return 200, {}, {"d": self.file_json(self.write_file(f"{path}/{match.group(1)}", body))}
+        if lower.startswith("/listitemallfields"):
+            mock_list = self.library_for(path)
+            if mock_list is None or path == mock_list.root_folder:
+                raise MockError(404, "Folder has no list item")
+            if lower.endswith("/parentlist"):
+                return 200, {}, {"d": self.list_json(mock_list)}
+            # Los items de carpetas no se modelan: basta con que tengan un Id
+            return 200, {}, {"d": {"__metadata": {"type": mock_list.entity_type}, "Id": 0}}
+        raise MockError(404, f"Unknown folder endpoint {rest}")
+
+    def write_file(self, path: str, content: bytes) -> MockFile:
+        mock_file = self.files.get(path)
+        if mock_file is None:
+            mock_file = MockFile(path=path, content=bytearray(content))
+            mock_list = self.library_for(path)
+            if mock_list is not None:
+                row = self.insert_item(mock_list, {"FileRef": path, "FileLeafRef": path.rsplit("/", 1)[-1]})
+                mock_file.item_id = row["Id"]
+            self.files[path] = mock_file
+        else:
+            mock_file.content = bytearray(content)
+            mock_file.version += 1
+        return mock_file
+
+    def route_file(self, method: str, path: str, rest: str, headers: dict, body: bytes):
+        mock_file = self.files.get(path)
+        if mock_file is None:
+            raise MockError(404, f"File Not Found: {path}")
+        lower = rest.lower()
+        file_headers = {"ETag": mock_file.etag} if self.file_etags else {}
+        if lower == "":
+            if method == "DELETE":
+                del self.files[path]
+                return 200, {}, None
+            return 200, file_headers, {"d": self.file_json(mock_file)}
+        if lower == "/$value":
+            if headers.get("if-none-match") == mock_file.etag:
+                return 304, file_headers, b""
+            content = bytes(mock_file.content)
+            # Con If-Range el Range solo aplica si el archivo no cambio; si cambio se responde el archivo completo
+            if_range = headers.get("if-range")
+            match = re.match(r"bytes=(\d+)-(\d*)", headers.get("range", ""))
+            if match and (if_range is None or if_range == mock_file.etag):
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else len(content) - 1
+                return 206, {**file_headers, "Content-Type": "application/octet-stream"}, content[start:end + 1]
+            return 200, {**file_headers, "Content-Type": "application/octet-stream"}, content
+        if lower == "/listitemallfields":
+            mock_list = self.library_for(path)
+            if method in ("PATCH", "MERGE", "POST"):
+                return self.route_list(method, mock_list, f"/items({mock_file.item_id})", "", {}, json.loads(body))
+            return 200, {}, {"d": self.item_json(mock_list, mock_list.items[mock_file.item_id])}
+        if match := re.match(r"^/(startupload|continueupload|finishupload)\(uploadid=guid'([^']+)'"
+                             r"(?:,fileoffset=(\d+))?\)$", lower):
+            step, upload_id, offset = match.group(1), match.group(2), int(match.group(3) or 0)
+            if step == "startupload":
+                mock_file.upload_id = upload_id
+                mock_file.content = bytearray(body)
+                return 200, {}, {"d": {"StartUpload": str(len(mock_file.content))}}
+            if mock_file.upload_id != upload_id or offset != len(mock_file.content):
+                raise MockError(400, f"Invalid upload session or offset {offset}")
+            mock_file.content += body
+            if step == "continueupload":
+                return 200, {}, {"d": {"ContinueUpload": str(len(mock_file.content))}}
+            mock_file.upload_id = None
+            mock_file.version += 1
+            return 200, {}, {"d": self.file_json(mock_file)}
+        raise MockError(404, f"Unknown file endpoint {rest}")
+
+    def batch(self, headers: dict, body: bytes):
+        text = body.decode("utf-8")
+        responses = []
+        for part in re.split(r"^--changeset_[^\r\n]*\r?$", text, flags=re.MULTILINE)[1:]:
+            lines = part.strip("\r\n").splitlines()
+            request_line = next((line for line in lines if re.match(r"^[A-Z]+ \S+ HTTP/1\.1$", line)), None)
+            if request_line is None:
+                continue
+            method, url, _ = request_line.split(" ")
+            index = lines.index(request_line)
+            part_headers, body_lines = {}, []
+            for number, line in enumerate(lines[index + 1:], start=index + 1):
+                if not line.strip():
+                    body_lines = lines[number + 1:]
+                    break
+                key, _, value = line.partition(":")
+                part_headers[key.strip().lower()] = value.strip()
+            inner_body = "\n".join(body_lines).strip().encode("utf-8")
+            status, _, data = self.handle(method, url, part_headers, inner_body)
+            responses.append((status, data))
+
+        boundary = f"batchresponse_{uuid.uuid4()}"
+        lines = []
+        for status, data in responses:
+            lines += [f"--{boundary}", "Content-Type: application/http", "Content-Transfer-Encoding: binary", "",
+                      f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}",
+                      "CONTENT-TYPE: application/json;odata=verbose;charset=utf-8", "",
+                      json.dumps(data) if data is not None else ""]
+        lines += [f"--{boundary}--", ""]
+        return 200, {"Content-Type": f"multipart/mixed; boundary={boundary}"}, "\r\n".join(lines).encode("utf-8")
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def dispatch(self):
+        mock: MockSharePoint = self.server.mock
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        with mock._lock:
+            mock.request_count += 1
+            throttled = mock.throttle_every and mock.request_count % mock.throttle_every == 0
+        if mock.latency:
+            time.sleep(mock.latency)
+        if throttled:
+            status, headers, data = 429, {"Retry-After": str(mock.retry_after)}, {"error": "throttled"}
+        else:
+            headers = {key.lower(): value for key, value in self.headers.items()}
+            status, headers, data = mock.handle(self.command, self.path, headers, body)
+        if not isinstance(data, bytes):
+            data = json.dumps(data).encode("utf-8") if data is not None else b""
+            headers.setdefault("Content-Type", "application/json;odata=verbose;charset=utf-8")
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = do_MERGE = dispatch
+
+
+class MockServer:
+    """Levanta `MockSharePoint` en un thread. Usar como context manager"""
+
+    def __init__(self, mock: MockSharePoint = None, **kwargs):
+        self.mock = mock if mock is not None else MockSharePoint(**kwargs)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), MockRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self.mock
+        self.mock.base_url = self.base_url
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def client(self, session=None, **kwargs) -> SharePoint:
+        session = session if session is not None else SharepointSession(delay_secs=0)
+        return SharePoint(client_id="mock-client", tenant_id="mock-tenant", secret="mock-secret",
+                          domain="127.0.0.1", site=self.mock.site, session=session, base_url=self.base_url,
+                          login_url=self.base_url, **kwargs)
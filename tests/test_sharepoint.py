@@ -1,7 +1,12 @@
+import asyncio
+import os
+
 import pytest
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from sharepoint.parse_pydantic import pydantic_to_sharepoint
+from sharepoint import SharePoint, AsyncSharePoint, FileTokenStore
+from sharepoint.session import TokenBucket
+from sharepoint.utils import COLUMN_CODEC, COLUMN_ESCAPE, replace_string_map
 
 def test_get_folder(sharepoint):
     sharepoint.get_folder("Shared Documents/PreviRed")
@@ -25,7 +30,107 @@ def test_create_item_list(sharepoint):
 
 def test_modelos(pydantic_model, sharepoint):
     sp_list = sharepoint.get_list("TestingList")
-    fields = pydantic_to_sharepoint(pydantic_model)
-    for field in fields:
-        data = field.payload()
-        sp_list.create_field(data)
\ No newline at end of file
+    changes = sp_list.ensure_schema(pydantic_model)
+    assert not changes.errors and not changes.conflicts
+    assert not sp_list.ensure_schema(pydantic_model).changed
+
+def test_iter_items(sharepoint):
+    sp_list = sharepoint.get_list("TestingList")
+    items = sp_list.iter_items(page_size=2)
+    first = next(items, None)
+    print(first)
+
+
+def test_bulk_create(sharepoint):
+    sp_list = sharepoint.get_list("TestingList")
+    results = sp_list.bulk_create([{"Title": f"Bulk {i}"} for i in range(5)], batch_size=2)
+    assert all(result.ok for result in results)
+    sp_list.bulk_delete([result.data for result in results])
+
+
+def test_token_bucket_burst():
+    bucket = TokenBucket(rate=100, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    bucket.pause(0.05)
+    assert bucket.acquire() > 0
+
+
+def test_async_get_lists(settings):
+    async def fetch():
+        async with AsyncSharePoint(client_id=settings.client_id, tenant_id=settings.tenant_id,
+                                   secret=settings.secret, domain=settings.domain, site=settings.site) as client:
+            lists = await client.get_all_lists()
+            return await asyncio.gather(*[client.get_list(sp_list.title) for sp_list in lists])
+
+    asyncio.run(fetch())
+
+
+def test_upload_large_file(sharepoint, tmp_path):
+    path = tmp_path / "large.bin"
+    path.write_bytes(os.urandom(3 * 1024 * 1024 + 17))
+    folder = sharepoint.root_folder
+    file = folder.upload_file("large.bin", path, chunk_size=1024 * 1024)
+    assert file.download() == path.read_bytes()
+
+
+def test_download_to(sharepoint, tmp_path):
+    file = sharepoint.root_folder.get_file("large.bin")
+    path = tmp_path / "large.bin"
+    file.download_to(path, chunk_size=256 * 1024, workers=4)
+    assert path.stat().st_size == file.length
+
+
+def test_walk(sharepoint):
+    for folder, subfolders, files in sharepoint.walk("Shared Documents", max_depth=2, exclude=["Forms"]):
+        print(folder.server_relative_url, len(subfolders), len(files))
+
+
+def test_list_sync(sharepoint, tmp_path):
+    store = FileTokenStore(tmp_path / "tokens.json")
+    sp_list = sharepoint.get_list("TestingList")
+    assert sp_list.sync(store).full_resync
+    item = sp_list.create_item({"Title": "Delta"})
+    changes = sp_list.sync(store)
+    assert item.id in [added.id for added in changes.added]
+    item.delete()
+
+
+def test_field_schema_cache(sharepoint):
+    sp_list = sharepoint.get_list("TestingList")
+    schema = sp_list.field_schema
+    assert sp_list.get_field_by_static_name("Title") is schema.by_static_name["Title"]
+    sp_list.get_field_by_static_name("Title").update({"Required": False})
+    assert sp_list.field_schema is not schema
+
+
+@pytest.mark.parametrize("character, escaped", COLUMN_ESCAPE.items())
+def test_column_codec_round_trip(character, escaped):
+    name = f"Info{character}Governor"
+    assert COLUMN_CODEC.encode(name) == replace_string_map(name, COLUMN_ESCAPE)
+    assert COLUMN_CODEC.encode(name) == f"Info{escaped}Governor"
+    assert COLUMN_CODEC.decode(COLUMN_CODEC.encode(name)) == name
+
+
+@pytest.mark.parametrize("odata", ["minimalmetadata", "nometadata"])
+def test_lean_odata(settings, sharepoint_session, odata):
+    sharepoint = SharePoint(client_id=settings.client_id, tenant_id=settings.tenant_id, secret=settings.secret,
+                            domain=settings.domain, site=settings.site, session=sharepoint_session, odata=odata)
+    sp_list = sharepoint.get_list("TestingList")
+    for item in sp_list.iter_items(page_size=10):
+        assert item.uri.endswith(f"({item.id})")
+
+
+def test_query_projection(sharepoint):
+    class Row(BaseModel):
+        id: int = Field(alias="Id")
+        title: str | None = Field(alias="Title")
+
+    sp_list = sharepoint.get_list("TestingList")
+    rows = sp_list.query(Row).order_by("Id", descending=True).top(3).all()
+    assert len(rows) <= 3
+
+
+def test_iter_items_by_id(sharepoint):
+    sp_list = sharepoint.get_list("TestingList")
+    ids = [item.id for item in sp_list.iter_items_by_id(window=2, workers=4)]
+    assert ids == sorted(ids)